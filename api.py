@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+from typing import Optional
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from src.utils.pipeline import build_qa_system
+from src.utils.tracing import configure_tracing
+
+# JSON API for the React front end (see src/api/chat.ts); vite proxies /api to port 5000.
+# Run with: uvicorn api:app --port 5000
+
+load_dotenv()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "32"))
+MAX_QUEUED_REQUESTS = int(os.getenv("MAX_QUEUED_REQUESTS", "128"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("QUEUE_TIMEOUT_SECONDS", "10"))
+
+
+class AskRequest(BaseModel):
+    question: str
+    category: Optional[str] = None
+
+
+class ConcurrencyLimiter:
+    def __init__(self, max_concurrent: int, max_queued: int, queue_timeout: float):
+        """Cap in-flight requests and shed load once the wait queue is full.
+
+        Args:
+            max_concurrent (int): Requests processed at once
+            max_queued (int): Requests allowed to wait for a slot before new ones are rejected
+            queue_timeout (float): Seconds a request may wait for a slot
+        """
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+        self.in_flight = 0
+        self.rejected = 0
+
+    def check(self) -> None:
+        """Raise 503 if the wait queue is full."""
+        if self.waiting >= self.max_queued:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Server busy", headers={"Retry-After": "1"})
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a processing slot, raising 503 if the server is saturated."""
+        self.check()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Server busy", headers={"Retry-After": "1"})
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.semaphore.release()
+
+    def stats(self) -> dict:
+        return {"in_flight": self.in_flight, "waiting": self.waiting, "rejected": self.rejected}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if not OPENAI_API_KEY:
+        raise ValueError("OpenAI API key not found. Please set it in your .env file.")
+    # Per-stage timings go to the sinks named in TRACE_SINKS, e.g. "logging,prometheus"
+    app.state.tracer = configure_tracing()
+    # Load (or build) the shared index once per process, off the event loop
+    app.state.qa_system = await asyncio.to_thread(build_qa_system, OPENAI_API_KEY, "data")
+    app.state.limiter = ConcurrencyLimiter(MAX_CONCURRENT_REQUESTS, MAX_QUEUED_REQUESTS, QUEUE_TIMEOUT_SECONDS)
+    yield
+
+
+app = FastAPI(title="Cloud Ops AI Assistant API", lifespan=lifespan)
+
+
+@app.get("/api/initialize")
+async def initialize():
+    qa_system = app.state.qa_system
+    return {
+        "status": "ready",
+        "index_version": qa_system.vector_store.index_version,
+    }
+
+
+@app.post("/api/ask")
+async def ask(request: AskRequest):
+    async with app.state.limiter.slot():
+        return await app.state.qa_system.aanswer_question(request.question, request.category)
+
+
+@app.post("/api/ask/stream")
+async def ask_stream(request: AskRequest):
+    """Stream newline-delimited JSON events: tokens, then the answer with its sources."""
+    limiter = app.state.limiter
+    # Shed load before the response starts, but take the slot inside the stream: a client
+    # that disconnects before the body is read never runs the generator, so it can't leak one
+    limiter.check()
+
+    async def events():
+        try:
+            async with limiter.slot():
+                async for event in app.state.qa_system.astream_answer(request.question, request.category):
+                    yield json.dumps(event) + "\n"
+        except HTTPException as e:
+            yield json.dumps({"type": "error", "message": e.detail}) + "\n"
+        except Exception as e:
+            yield json.dumps({"type": "error", "message": str(e)}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@app.get("/api/stats")
+async def stats():
+    return {
+        "requests": app.state.limiter.stats(),
+        "cache": app.state.qa_system.cache_stats(),
+    }
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-stage latency histograms and token counters in the Prometheus text format."""
+    sink = app.state.tracer.prometheus()
+    if sink is None:
+        raise HTTPException(status_code=404, detail="Add prometheus to TRACE_SINKS to enable metrics")
+    return sink.render()
@@ -1,9 +1,9 @@
 import os
 import streamlit as st
 from dotenv import load_dotenv
-from src.utils.document_loader import DocumentLoader
-from src.utils.vector_store import VectorStore
-from src.utils.qa_system import QASystem
+from src.utils.pipeline import build_qa_system
+from src.utils.categories import CATEGORIES
+from src.utils.tracing import configure_tracing
 from datetime import datetime
 
 # Load environment variables
@@ -220,16 +220,8 @@ def initialize_components():
     if not OPENAI_API_KEY:
         raise ValueError("OpenAI API key not found. Please set it in your .env file.")
     
-    # Load documents
-    loader = DocumentLoader()
-    docs = loader.load_pdfs("data")
-    
-    # Create vector store
-    vector_store = VectorStore(OPENAI_API_KEY)
-    vector_store.create_vector_store(docs)
-    
-    # Create QA system
-    qa_system = QASystem(OPENAI_API_KEY, vector_store)
+    configure_tracing()
+    qa_system = build_qa_system(OPENAI_API_KEY, "data")
     
     return qa_system
 
@@ -245,8 +237,7 @@ with st.sidebar:
     """)
     
     st.markdown("### Categories")
-    categories = ["General", "Security", "Compute", "Storage", "Networking", "Database", "DevOps"]
-    for category in categories:
+    for category in CATEGORIES:
         if st.button(category, key=f"cat_{category}"):
             st.session_state.selected_category = category
             st.rerun()
@@ -266,7 +257,7 @@ st.markdown('<div class="header"><span class="header-icon">☁️</span><h1>Clou
 
 # Category selection
 st.markdown('<div class="category-pills">', unsafe_allow_html=True)
-for category in ["General", "Security", "Compute", "Storage", "Networking", "Database", "DevOps"]:
+for category in CATEGORIES:
     active = "active" if category == st.session_state.selected_category else ""
     st.markdown(f'<span class="category-pill {active}">{category}</span>', unsafe_allow_html=True)
 st.markdown('</div>', unsafe_allow_html=True)
@@ -315,53 +306,64 @@ if st.session_state.chat_history:
 # Answer Display
 if query and search_button:
     st.session_state.processing = True
-    with st.spinner(""):
-        st.markdown('<div class="loading"></div>', unsafe_allow_html=True)
-        try:
-            result = qa_system.answer_question(query)
-            
-            # Add to chat history
-            st.session_state.chat_history.append({
-                "role": "user",
-                "content": query,
-                "timestamp": datetime.now().strftime("%H:%M")
-            })
-            st.session_state.chat_history.append({
-                "role": "assistant",
-                "content": result["answer"],
-                "timestamp": datetime.now().strftime("%H:%M")
-            })
-            
-            # Display answer
-            st.markdown(f'<div class="answer-container {st.session_state.theme}">', unsafe_allow_html=True)
-            st.markdown("### 💡 Answer")
-            st.markdown(f'<div class="answer-box">{result["answer"]}</div>', unsafe_allow_html=True)
-            
-            # Action buttons
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.button("📋 Copy Answer", key="copy_answer")
-            with col2:
-                st.button("💾 Save to Favorites", key="save_favorite")
-            with col3:
-                st.button("📤 Share", key="share")
-            
-            # Display sources
-            if result["sources"]:
-                st.markdown("### 📚 Sources")
-                for i, source in enumerate(result["sources"], 1):
-                    with st.expander(f"Source {i}"):
-                        st.markdown(f'<div class="source-box {st.session_state.theme}">{source["content"]}</div>',
-                                  unsafe_allow_html=True)
-                        if "metadata" in source:
-                            st.caption(f"Source: {source['metadata'].get('source', 'Unknown')}")
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-        except Exception as e:
-            st.error(f"An error occurred: {str(e)}")
-        finally:
-            st.session_state.processing = False
-            st.rerun()
+    try:
+        st.markdown(f'<div class="answer-container {st.session_state.theme}">', unsafe_allow_html=True)
+        st.markdown("### 💡 Answer")
+        answer_box = st.empty()
+        answer_box.markdown('<div class="loading"></div>', unsafe_allow_html=True)
+        
+        # Render tokens as they arrive
+        result = {"answer": "", "sources": []}
+        # The selected category narrows retrieval; "General" searches everything
+        for event in qa_system.stream_answer(query, st.session_state.selected_category):
+            if event["type"] == "token":
+                result["answer"] += event["content"]
+                answer_box.markdown(f'<div class="answer-box">{result["answer"]}</div>', unsafe_allow_html=True)
+            else:
+                result = event
+        answer_box.markdown(f'<div class="answer-box">{result["answer"]}</div>', unsafe_allow_html=True)
+        
+        # Add to chat history
+        st.session_state.chat_history.append({
+            "role": "user",
+            "content": query,
+            "timestamp": datetime.now().strftime("%H:%M")
+        })
+        st.session_state.chat_history.append({
+            "role": "assistant",
+            "content": result["answer"],
+            "timestamp": datetime.now().strftime("%H:%M")
+        })
+        
+        # Action buttons
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.button("📋 Copy Answer", key="copy_answer")
+        with col2:
+            st.button("💾 Save to Favorites", key="save_favorite")
+        with col3:
+            st.button("📤 Share", key="share")
+        
+        # Display sources
+        if result["sources"]:
+            st.markdown("### 📚 Sources")
+            for i, source in enumerate(result["sources"], 1):
+                with st.expander(f"Source {i}"):
+                    st.markdown(f'<div class="source-box {st.session_state.theme}">{source["content"]}</div>',
+                              unsafe_allow_html=True)
+                    caption = f"Source: {source.get('source', 'Unknown')}"
+                    if source.get("page"):
+                        caption += f", page {source['page']}"
+                    if source.get("score") is not None:
+                        caption += f" · relevance {source['score']:.3f}"
+                    st.caption(caption)
+        st.markdown('</div>', unsafe_allow_html=True)
+        
+    except Exception as e:
+        st.error(f"An error occurred: {str(e)}")
+    finally:
+        st.session_state.processing = False
+        st.rerun()
 
 # Footer
 st.markdown("""
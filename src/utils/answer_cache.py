@@ -0,0 +1,170 @@
+from typing import Any, Dict, Hashable, List, Optional
+from collections import OrderedDict
+import copy
+import re
+import threading
+import time
+import numpy as np
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for exact-match caching: case, whitespace and trailing punctuation."""
+    question = re.sub(r"\s+", " ", question.strip().lower())
+    return question.rstrip("?!. ")
+
+
+class AnswerCache:
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600):
+        """In-memory LRU cache of answers with a time-to-live.
+
+        Args:
+            max_entries (int): Entries kept before the least recently used is evicted
+            ttl_seconds (float): Seconds an entry stays valid
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached value, or None if missing or expired."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, key: Hashable, value: Dict[str, Any]) -> None:
+        """Store a value, evicting the least recently used entries beyond `max_entries`."""
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current number of entries."""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self.entries),
+            }
+
+
+class SemanticAnswerCache:
+    def __init__(self, embeddings, similarity_threshold: float = 0.95, max_entries: int = 1000,
+                 ttl_seconds: float = 3600):
+        """Answer cache matching questions by embedding similarity.
+
+        Past question embeddings are kept normalized in a small in-memory
+        matrix and searched exactly by inner product. Each entry belongs to a
+        partition (the search category) and only matches questions in the same
+        partition. All entries are dropped when the scope (index version,
+        model, retriever settings) changes.
+
+        Args:
+            embeddings: Object with an `embed_query(text)` method
+            similarity_threshold (float): Minimum cosine similarity for a question to reuse an answer
+            max_entries (int): Entries kept before the least recently used is evicted
+            ttl_seconds (float): Seconds an entry stays valid
+        """
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.scope: Optional[Hashable] = None
+        self.vectors: Optional[np.ndarray] = None
+        self.entries: List[Dict[str, Any]] = []
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def embed(self, question: str) -> np.ndarray:
+        """Embed and normalize a question."""
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    async def aembed(self, question: str) -> np.ndarray:
+        """Embed and normalize a question without blocking the event loop."""
+        vector = np.asarray(await self.embeddings.aembed_query(question), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def get(self, vector: np.ndarray, scope: Hashable, partition: Hashable = None) -> Optional[Dict[str, Any]]:
+        """Return a copy of the answer to the most similar past question above the threshold."""
+        with self.lock:
+            self._check_scope(scope)
+            now = time.monotonic()
+            self._prune(now)
+            if self.entries:
+                scores = self.vectors @ vector
+                scores[[entry["partition"] != partition for entry in self.entries]] = -np.inf
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    entry = self.entries[best]
+                    entry["last_used"] = now
+                    self.hits += 1
+                    return copy.deepcopy(entry["value"])
+            self.misses += 1
+            return None
+
+    def put(self, vector: np.ndarray, scope: Hashable, value: Dict[str, Any], partition: Hashable = None) -> None:
+        """Store an answer, evicting expired and then least recently used entries."""
+        with self.lock:
+            self._check_scope(scope)
+            now = time.monotonic()
+            self._prune(now)
+            self.entries.append({"value": copy.deepcopy(value), "partition": partition,
+                                 "expires": now + self.ttl_seconds, "last_used": now})
+            self.vectors = vector[None, :] if self.vectors is None else np.vstack([self.vectors, vector])
+            if len(self.entries) > self.max_entries:
+                keep = sorted(range(len(self.entries)), key=lambda i: self.entries[i]["last_used"])[-self.max_entries:]
+                keep.sort()
+                self.entries = [self.entries[i] for i in keep]
+                self.vectors = self.vectors[keep]
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self.lock:
+            self.entries = []
+            self.vectors = None
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current number of entries."""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self.entries),
+            }
+
+    def _prune(self, now: float) -> None:
+        """Drop expired entries, so they can't shadow a valid match."""
+        keep = [i for i, entry in enumerate(self.entries) if entry["expires"] >= now]
+        if len(keep) < len(self.entries):
+            self.entries = [self.entries[i] for i in keep]
+            self.vectors = self.vectors[keep] if keep else None
+
+    def _check_scope(self, scope: Hashable) -> None:
+        """Invalidate everything when the index, model or retriever settings change."""
+        if scope != self.scope:
+            self.scope = scope
+            self.entries = []
+            self.vectors = None
@@ -0,0 +1,330 @@
+from typing import Any, Dict, Iterator, List, Optional
+from pathlib import Path
+from langchain.chat_models.base import BaseChatModel
+from langchain.embeddings.base import Embeddings
+from langchain.schema import AIMessage, BaseMessage, ChatGeneration, ChatResult
+from langchain.schema.messages import AIMessageChunk
+from langchain.schema.output import ChatGenerationChunk
+from src.utils.document_loader import DocumentLoader
+from src.utils.vector_store import VectorStore
+from src.utils.qa_system import QASystem
+import argparse
+import asyncio
+import json
+import platform
+import random
+import re
+import resource
+import sys
+import tempfile
+import time
+import zlib
+import numpy as np
+
+# Offline benchmark of ingest → index → retrieve → answer.
+# Run with: python -m src.utils.benchmark --sizes 50 200 1000 --output benchmark_results.json
+
+SERVICES = [
+    ("ec2", "Amazon EC2"), ("s3", "Amazon S3"), ("lambda", "AWS Lambda"), ("vpc", "Amazon VPC"),
+    ("rds", "Amazon RDS"), ("iam", "AWS IAM"), ("dynamodb", "Amazon DynamoDB"), ("cloudformation", "AWS CloudFormation"),
+]
+VERBS = ["configure", "encrypt", "monitor", "restrict access to", "replicate", "back up", "scale", "tag", "audit"]
+OBJECTS = [
+    "instances", "buckets", "functions", "subnets", "snapshots", "security groups", "route tables",
+    "access policies", "stacks", "tables", "KMS keys", "log groups", "t3.micro instances", "s3:PutObject calls",
+]
+QUALIFIERS = [
+    "across regions", "with the AWS CLI", "using least privilege", "during a deployment", "in a private subnet",
+    "with CloudWatch alarms", "for compliance reports", "without downtime", "from the console",
+]
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:[:._\-][a-z0-9]+)*")
+LINES_PER_PAGE = 45
+PAGES_PER_FILE = 50
+
+
+class HashEmbeddings(Embeddings):
+    def __init__(self, dimensions: int = 256, latency: float = 0.0):
+        """Deterministic bag-of-words embeddings; texts sharing words get similar vectors.
+
+        Args:
+            dimensions (int): Vector size
+            latency (float): Seconds slept per call, to mimic an embeddings API
+        """
+        self.dimensions = dimensions
+        self.latency = latency
+        self.model = f"hash-{dimensions}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._embed(text)
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in WORD_PATTERN.findall(text.lower()):
+            h = zlib.crc32(word.encode("utf-8"))
+            vector[h % self.dimensions] += 1.0 if h & 1 << 31 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that streams back the first words of the prompt's last message."""
+    model_name: str = "fake-chat"
+    answer_tokens: int = 40
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                  **kwargs: Any) -> ChatResult:
+        text = "".join(self._tokens(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        for token in self._tokens(messages):
+            if self.latency:
+                time.sleep(self.latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                       **kwargs: Any):
+        for token in self._tokens(messages):
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        return [word + " " for word in messages[-1].content.split()[:self.answer_tokens]]
+
+
+def _sentence(rng: random.Random, service: str) -> str:
+    return f"{service} lets you {rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(QUALIFIERS)}."
+
+
+def synthetic_question(rng: random.Random) -> str:
+    """A question in the vocabulary of the synthetic corpus."""
+    _, service = rng.choice(SERVICES)
+    return f"How do I {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {service} {rng.choice(QUALIFIERS)}?"
+
+
+def write_synthetic_pdf(path: Path, pages: int, service: str, rng: random.Random) -> None:
+    """Write a plain-text PDF of AWS-flavoured sentences that pypdf can extract.
+
+    Args:
+        path (Path): Output file
+        pages (int): Number of pages
+        service (str): Service the guide is about; most sentences mention it
+        rng (random.Random): Seeded generator, so corpora are reproducible
+    """
+    page_streams = []
+    for page in range(pages):
+        lines = [f"{service} User Guide - page {page + 1}"]
+        while len(lines) < LINES_PER_PAGE:
+            _, other = rng.choice(SERVICES)
+            lines.append(_sentence(rng, service if rng.random() < 0.7 else other))
+        text = " T* ".join("(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj"
+                           for line in lines)
+        page_streams.append(f"BT /F1 10 Tf 14 TL 40 800 Td {text} ET".encode("latin-1"))
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then a page and its content stream per page
+    page_ids = [4 + 2 * i for i in range(pages)]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {pages} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for page_id, stream in zip(page_ids, page_streams):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Contents {page_id + 1} 0 R "
+                       f"/Resources << /Font << /F1 3 0 R >> >> >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def write_synthetic_corpus(directory: Path, pages: int, seed: int = 0) -> int:
+    """Write `pages` pages of synthetic guides, PAGES_PER_FILE per PDF; returns the file count."""
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    files = 0
+    while pages > 0:
+        name, service = SERVICES[files % len(SERVICES)]
+        count = min(pages, PAGES_PER_FILE)
+        write_synthetic_pdf(directory / f"{name}-guide-{files}.pdf", count, service, rng)
+        pages -= count
+        files += 1
+    return files
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 and mean of latencies, in milliseconds."""
+    values = np.array(samples) * 1000
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "p99": float(np.percentile(values, 99)),
+        "mean": float(values.mean()),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_benchmark(pages: int, queries: int = 200, seed: int = 0, workers: int = 1,
+                  index_config: Optional[Dict[str, Any]] = None, embedding_latency: float = 0.0,
+                  llm_latency: float = 0.0) -> Dict[str, Any]:
+    """Build a synthetic corpus and time every pipeline stage on it.
+
+    Args:
+        pages (int): Corpus size in pages
+        queries (int): Questions timed for retrieval and for answering
+        seed (int): Seed for the corpus and the questions
+        workers (int): PDF parsing worker processes
+        index_config (Optional[Dict[str, Any]]): FAISS index configuration
+        embedding_latency (float): Seconds each fake embeddings call takes
+        llm_latency (float): Seconds per token streamed by the fake chat model
+
+    Returns:
+        Dict[str, Any]: Throughput, latency percentiles (ms) and memory for this size
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / "data"
+        store_dir = str(Path(tmp) / "vector_store")
+        files = write_synthetic_corpus(data_dir, pages, seed)
+        loader = DocumentLoader(max_workers=workers, parse_cache=None)
+
+        start = time.perf_counter()
+        chunks = list(loader.iter_chunks(str(data_dir)))
+        parse_seconds = time.perf_counter() - start
+
+        vector_store = VectorStore("offline", embedding_cache=None, index_config=index_config,
+                                   embeddings=HashEmbeddings(latency=embedding_latency))
+        start = time.perf_counter()
+        vector_store.create_vector_store(chunks, store_dir, corpus_fingerprint=loader.corpus_fingerprint(str(data_dir)))
+        build_seconds = time.perf_counter() - start
+        embed_seconds = vector_store.scheduler.stats["seconds"]
+
+        start = time.perf_counter()
+        vector_store.load_vector_store(store_dir, mmap=True)
+        load_seconds = time.perf_counter() - start
+
+        qa_system = QASystem("offline", vector_store, semantic_cache_threshold=None,
+                             llm=FakeChatModel(latency=llm_latency))
+        rng = random.Random(seed + 1)
+        questions = [synthetic_question(rng) for _ in range(queries)]
+        retrieve_latencies, answer_latencies = [], []
+        for question in questions:
+            start = time.perf_counter()
+            vector_store.hybrid_search(question, k=qa_system.search_kwargs["k"])
+            retrieve_latencies.append(time.perf_counter() - start)
+        for question in questions:
+            qa_system.answer_cache.clear()
+            start = time.perf_counter()
+            qa_system.answer_question(question)
+            answer_latencies.append(time.perf_counter() - start)
+
+        return {
+            "pages": pages,
+            "files": files,
+            "chunks": len(chunks),
+            "index_type": vector_store.index_config["type"],
+            "parse_seconds": parse_seconds,
+            "pages_per_second": pages / parse_seconds,
+            "embed_seconds": embed_seconds,
+            "chunks_per_second": len(chunks) / max(embed_seconds, 1e-9),
+            "build_seconds": build_seconds,
+            "index_seconds": build_seconds - embed_seconds,
+            "load_seconds": load_seconds,
+            "retrieve_ms": percentiles(retrieve_latencies),
+            "answer_ms": percentiles(answer_latencies),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Describe how each size's headline metrics moved against a previous results file."""
+    previous = {run["pages"]: run for run in baseline.get("runs", [])}
+    lines = []
+    for run in results["runs"]:
+        before = previous.get(run["pages"])
+        if before is None:
+            continue
+        for label, key, sub in (("pages/s", "pages_per_second", None), ("chunks/s", "chunks_per_second", None),
+                                ("build s", "build_seconds", None), ("retrieve p95 ms", "retrieve_ms", "p95"),
+                                ("answer p95 ms", "answer_ms", "p95"), ("peak RSS MB", "peak_rss_mb", None)):
+            new, old = run[key], before[key]
+            if sub:
+                new, old = new[sub], old[sub]
+            change = (new - old) / old * 100 if old else 0.0
+            lines.append(f"{run['pages']:>6} pages  {label:<16} {old:10.2f} → {new:10.2f} ({change:+.1f}%)")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Benchmark the RAG pipeline offline with fake models.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000], help="Corpus sizes in pages")
+    parser.add_argument("--queries", type=int, default=200, help="Questions timed per size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="PDF parsing worker processes")
+    parser.add_argument("--index-type", default=None, help="FAISS index type (flat, ivf_flat, ivf_pq, hnsw)")
+    parser.add_argument("--embedding-latency", type=float, default=0.0, help="Seconds per fake embeddings call")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds per fake chat token")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the results JSON")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    index_config = {"type": args.index_type} if args.index_type else None
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "runs": [],
+    }
+    # Smallest first, so the process-wide peak RSS grows with corpus size
+    for pages in sorted(args.sizes):
+        print(f"\n📊 Benchmarking {pages} pages...")
+        run = run_benchmark(pages, args.queries, args.seed, args.workers, index_config,
+                            args.embedding_latency, args.llm_latency)
+        results["runs"].append(run)
+        print(f"✅ {run['chunks']} chunks | parse {run['pages_per_second']:.1f} pages/s | "
+              f"embed {run['chunks_per_second']:.1f} chunks/s | build {run['build_seconds']:.2f}s | "
+              f"retrieve p50/p95/p99 {run['retrieve_ms']['p50']:.1f}/{run['retrieve_ms']['p95']:.1f}/"
+              f"{run['retrieve_ms']['p99']:.1f} ms | answer p95 {run['answer_ms']['p95']:.1f} ms | "
+              f"peak RSS {run['peak_rss_mb']:.0f} MB")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\n📈 Compared with {args.compare}:")
+        for line in compare(results, baseline):
+            print(line)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+from typing import Dict, List, Optional, Tuple
+from collections import defaultdict
+import json
+import os
+import re
+import numpy as np
+
+
+VOCAB_FILE = "bm25_vocab.json"
+ARRAY_FILES = ("bm25_term_offsets", "bm25_rows", "bm25_tf", "bm25_doc_lengths")
+
+# Identifier-like tokens: s3:PutBucketPolicy, t3.micro, --query, AssumeRole, arn:aws:iam::...
+TOKEN_PATTERN = re.compile(r"-{0,2}[a-z0-9]+(?:[:._/\-]+[a-z0-9]+)*")
+PART_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase terms, keeping compound AWS identifiers whole.
+
+    A compound token such as `s3:putbucketpolicy` is emitted together with its
+    parts (`s3`, `putbucketpolicy`), so both exact and partial matches score.
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        parts = PART_PATTERN.findall(token)
+        if len(parts) > 1 or parts[0] != token:
+            terms.extend(parts)
+    return terms
+
+
+class BM25Builder:
+    def __init__(self):
+        """Accumulate postings for chunks added in FAISS row order."""
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+
+    def add(self, text: str) -> None:
+        """Index the next row's text."""
+        row = len(self.doc_lengths)
+        terms = tokenize(text)
+        counts: Dict[str, int] = defaultdict(int)
+        for term in terms:
+            counts[term] += 1
+        for term, tf in counts.items():
+            self.postings[term].append((row, tf))
+        self.doc_lengths.append(len(terms))
+
+    def save(self, directory: str) -> None:
+        """Write the index as a vocabulary plus CSR-style postings arrays.
+
+        Postings for term i are rows[term_offsets[i]:term_offsets[i + 1]],
+        stored as uint32 rows and uint16 term frequencies.
+        """
+        vocab = sorted(self.postings)
+        offsets = np.zeros(len(vocab) + 1, dtype=np.uint64)
+        for i, term in enumerate(vocab):
+            offsets[i + 1] = offsets[i] + len(self.postings[term])
+        rows = np.empty(int(offsets[-1]), dtype=np.uint32)
+        tf = np.empty(int(offsets[-1]), dtype=np.uint16)
+        for i, term in enumerate(vocab):
+            start, end = int(offsets[i]), int(offsets[i + 1])
+            postings = np.array(self.postings[term], dtype=np.uint32)
+            rows[start:end] = postings[:, 0]
+            tf[start:end] = np.minimum(postings[:, 1], np.iinfo(np.uint16).max)
+
+        arrays = dict(zip(ARRAY_FILES, (offsets, rows, tf, np.array(self.doc_lengths, dtype=np.uint32))))
+        for name, array in arrays.items():
+            with open(os.path.join(directory, name + ".npy.tmp"), "wb") as f:
+                np.save(f, array)
+        with open(os.path.join(directory, VOCAB_FILE + ".tmp"), "w") as f:
+            json.dump(vocab, f, ensure_ascii=False)
+        for name in ARRAY_FILES:
+            os.replace(os.path.join(directory, name + ".npy.tmp"), os.path.join(directory, name + ".npy"))
+        os.replace(os.path.join(directory, VOCAB_FILE + ".tmp"), os.path.join(directory, VOCAB_FILE))
+
+
+class BM25Index:
+    def __init__(self, vocab: List[str], term_offsets: np.ndarray, rows: np.ndarray, tf: np.ndarray,
+                 doc_lengths: np.ndarray, k1: float = 1.2, b: float = 0.75):
+        """Okapi BM25 over CSR postings, scored with vectorized numpy.
+
+        Args:
+            vocab (List[str]): Sorted terms; term i's postings start at term_offsets[i]
+            term_offsets (np.ndarray): Postings offsets, one more than the vocabulary size
+            rows (np.ndarray): FAISS rows of each posting
+            tf (np.ndarray): Term frequency of each posting
+            doc_lengths (np.ndarray): Term count per row
+            k1 (float): Term-frequency saturation
+            b (float): Length normalization
+        """
+        self.term_ids = {term: i for i, term in enumerate(vocab)}
+        self.term_offsets = term_offsets
+        self.rows = rows
+        self.tf = tf
+        self.k1 = k1
+        self.b = b
+        self.num_docs = len(doc_lengths)
+        avg_length = float(np.mean(doc_lengths)) if self.num_docs else 0.0
+        # Per-row length normalization is fixed, so compute it once
+        self.length_norm = (k1 * (1 - b + b * doc_lengths / (avg_length or 1.0))).astype(np.float32)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = False) -> Optional["BM25Index"]:
+        """Load a saved index, or return None if the directory has none.
+
+        Args:
+            directory (str): Vector store directory
+            mmap (bool): Memory-map the postings arrays read-only
+        """
+        paths = [os.path.join(directory, name + ".npy") for name in ARRAY_FILES]
+        vocab_path = os.path.join(directory, VOCAB_FILE)
+        if not all(os.path.exists(path) for path in paths + [vocab_path]):
+            return None
+        with open(vocab_path) as f:
+            vocab = json.load(f)
+        arrays = [np.load(path, mmap_mode="r" if mmap else None) for path in paths]
+        return cls(vocab, *arrays)
+
+    def search(self, query: str, k: int = 20, allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the top-k rows and their BM25 scores, best first.
+
+        Args:
+            query (str): Query text
+            k (int): Number of rows to return
+            allowed (Optional[np.ndarray]): Boolean mask over rows to restrict results to
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (rows, scores)
+        """
+        term_ids = {self.term_ids[term] for term in tokenize(query) if term in self.term_ids}
+        if not term_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        row_parts, score_parts = [], []
+        for term_id in term_ids:
+            start, end = int(self.term_offsets[term_id]), int(self.term_offsets[term_id + 1])
+            rows = np.asarray(self.rows[start:end])
+            tf = np.asarray(self.tf[start:end], dtype=np.float32)
+            df = end - start
+            idf = np.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            row_parts.append(rows)
+            score_parts.append(idf * tf * (self.k1 + 1) / (tf + self.length_norm[rows]))
+
+        # Sum per-row contributions without touching rows that don't match
+        matched, inverse = np.unique(np.concatenate(row_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts)).astype(np.float32)
+        if allowed is not None:
+            keep = allowed[matched]
+            matched, scores = matched[keep], scores[keep]
+        k = min(k, len(matched))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return matched[top].astype(np.int64), scores[top]
+
+
+def reciprocal_rank_fusion(rankings: List[np.ndarray], k: int = 60) -> List[Tuple[int, float]]:
+    """Fuse ranked row lists with reciprocal-rank fusion.
+
+    Args:
+        rankings (List[np.ndarray]): Row ids per retriever, best first
+        k (int): RRF damping constant
+
+    Returns:
+        List[Tuple[int, float]]: (row, fused score), best first
+    """
+    fused: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            fused[int(row)] += 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,85 @@
+from typing import Dict, List
+from collections import Counter
+from langchain.schema import Document
+from src.utils.chunker import CODE_PATTERN
+import re
+
+# Running headers and footers sit in the first and last few lines of a page
+EDGE_LINES = 3
+
+# A line is boilerplate if it appears at the edge of at least this share of a file's pages
+MIN_PAGE_FRACTION = 0.5
+
+# Files shorter than this have too few pages to tell boilerplate from content
+MIN_PAGES = 3
+
+# AWS guides end with a change log ("Document history for the ... User Guide"); only
+# looked for in the last quarter of a file so a mention earlier on is kept
+HISTORY_HEADING = re.compile(r"^document history\b", re.IGNORECASE)
+HISTORY_FRACTION = 0.75
+
+DIGITS = re.compile(r"\d+")
+WHITESPACE = re.compile(r"\s+")
+HAS_WORD = re.compile(r"[A-Za-z0-9]")
+
+
+def _normalize(line: str) -> str:
+    """Key a line so "Page 12" and "Page 13" (or "User Guide 4"/"5") count as the same line."""
+    return DIGITS.sub("#", WHITESPACE.sub(" ", line.strip())).lower()
+
+
+def _edges(lines: List[str]) -> List[int]:
+    """Indices of the first and last EDGE_LINES non-empty lines of a page that could be boilerplate.
+
+    Lines without letters or digits (closing braces, rules) and code, CLI or
+    JSON lines (`"Statement": []` repeats across policy examples) are content.
+    """
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    return [i for i in sorted(set(filled[:EDGE_LINES] + filled[-EDGE_LINES:]))
+            if HAS_WORD.search(lines[i]) and not CODE_PATTERN.match(lines[i])]
+
+
+def strip_boilerplate(pages: List[Document]) -> Dict[str, int]:
+    """Remove running headers, footers, page numbers and other lines repeated across a file's pages.
+
+    A line is removed where it appears among the first or last lines of a
+    page and, with digits ignored, at the edge of at least half the file's
+    pages. Lines without letters or digits and code/JSON lines are never
+    treated as boilerplate. A "Document history" change log at the end of the
+    file is dropped as well. Pages are edited in place.
+
+    Args:
+        pages (List[Document]): Pages of one PDF
+
+    Returns:
+        Dict[str, int]: Each removed line, as first seen, with the number of pages it was
+            removed from; a removed change log appears as "Document history" with its page count
+    """
+    if len(pages) < MIN_PAGES:
+        return {}
+
+    page_lines = [page.page_content.splitlines() for page in pages]
+    counts: Counter = Counter()
+    for lines in page_lines:
+        counts.update({_normalize(lines[i]) for i in _edges(lines)})
+    repeated = {key for key, count in counts.items() if count >= max(2, len(pages) * MIN_PAGE_FRACTION)}
+
+    removed: Dict[str, int] = {}
+    samples: Dict[str, str] = {}
+    for page, lines in zip(pages, page_lines):
+        drop = {i for i in _edges(lines) if _normalize(lines[i]) in repeated}
+        if not drop:
+            continue
+        for i in drop:
+            sample = samples.setdefault(_normalize(lines[i]), lines[i].strip())
+            removed[sample] = removed.get(sample, 0) + 1
+        page.page_content = "\n".join(line for i, line in enumerate(lines) if i not in drop)
+
+    for start in range(int(len(pages) * HISTORY_FRACTION), len(pages)):
+        first = next((line.strip() for line in pages[start].page_content.splitlines() if line.strip()), "")
+        if HISTORY_HEADING.match(first):
+            for page in pages[start:]:
+                page.page_content = ""
+            removed["Document history"] = len(pages) - start
+            break
+    return removed
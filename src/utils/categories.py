@@ -0,0 +1,63 @@
+from typing import List, Optional
+from pathlib import Path
+import re
+
+
+# Categories offered in the UI; "General" means no filter
+CATEGORIES = ["General", "Security", "Compute", "Storage", "Networking", "Database", "DevOps"]
+
+# Primary category by source PDF name
+SOURCE_CATEGORIES = [
+    ("security", "Security"),
+    ("iam", "Security"),
+    ("ec2", "Compute"),
+    ("lambda", "Compute"),
+    ("s3", "Storage"),
+    ("vpc", "Networking"),
+    ("rds", "Database"),
+    ("dynamodb", "Database"),
+    ("cli", "DevOps"),
+    ("cloudformation", "DevOps"),
+]
+
+# Extra categories for sections of a guide that are about another topic
+SECTION_PATTERNS = {
+    "Security": re.compile(r"\b(iam|encryption|kms|security group|least privilege|mfa|access polic(?:y|ies))\b"),
+    "Compute": re.compile(r"\b(ec2|instance types?|auto scaling|lambda|ami)\b"),
+    "Storage": re.compile(r"\b(s3|bucket|ebs|efs|glacier|snapshot)\b"),
+    "Networking": re.compile(r"\b(vpc|subnets?|route tables?|internet gateway|nat gateway|elastic ip|cidr)\b"),
+    "Database": re.compile(r"\b(rds|dynamodb|aurora|database|redshift)\b"),
+    "DevOps": re.compile(r"\b(aws cli|cloudformation|codepipeline|codebuild|ci/cd|--query|--output)\b"),
+}
+
+# Keyword matches needed before a section is tagged with an extra category
+SECTION_MIN_MATCHES = 2
+
+
+def categorize(source: str, text: str) -> List[str]:
+    """Tag a chunk with its source PDF's category plus any topic its text is clearly about.
+
+    Args:
+        source (str): Path of the source PDF
+        text (str): Chunk text
+
+    Returns:
+        List[str]: Categories, primary first; "General" if nothing matches
+    """
+    name = Path(source).stem.lower()
+    categories = []
+    for keyword, category in SOURCE_CATEGORIES:
+        if keyword in name and category not in categories:
+            categories.append(category)
+            break
+
+    lowered = text.lower()
+    for category, pattern in SECTION_PATTERNS.items():
+        if category not in categories and len(pattern.findall(lowered)) >= SECTION_MIN_MATCHES:
+            categories.append(category)
+    return categories or ["General"]
+
+
+def search_category(category: Optional[str]) -> Optional[str]:
+    """Map a UI category to a retrieval filter; "General" and None search everything."""
+    return None if category in (None, "General") else category
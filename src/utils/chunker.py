@@ -0,0 +1,314 @@
+from typing import Any, Dict, List, Optional, Tuple
+from bisect import bisect_right
+from langchain.schema import Document
+import re
+import tiktoken
+
+# Section headings: "Creating a bucket", "Step 2: Configure the CLI", "3.1 Access control"
+HEADING_PATTERN = re.compile(r"^(?:(?:\d+(?:\.\d+)*|Step \d+:)\s+)?[A-Z][\w'’()/,&:-]*(?: [\w'’()/,&:-]+){0,11}$")
+# Procedure steps: "1. Open the console", "2) Choose Create"
+STEP_PATTERN = re.compile(r"^\s*\d{1,2}[.)]\s+\S")
+# CLI synopsis and example lines, policy JSON and other literal blocks
+CODE_PATTERN = re.compile(
+    r"^\s*(?:\$ |aws \S|--[a-z][\w-]*|[{}\[\]]|\"[\w:.-]+\"\s*:|<[A-Za-z]|#!|\w+\s*=\s*\S|    \S)"
+)
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z(\"'])")
+
+PROSE, HEADING, STEPS, CODE = "prose", "heading", "steps", "code"
+
+
+class TextBuffer:
+    __slots__ = ("blocks", "offsets", "pages")
+
+    def __init__(self, pages: List[Dict[str, Any]]):
+        """Normalized text of one PDF, shared by all of its chunks.
+
+        The text is kept as the list of its blocks rather than one joined
+        string, so it is never held twice. Offsets address the blocks as if
+        they were joined with newlines.
+
+        Args:
+            pages (List[Dict[str, Any]]): Metadata of each page, indexed by page id
+        """
+        self.blocks: List[str] = []
+        self.offsets: List[int] = []
+        self.pages = pages
+
+    def append(self, text: str) -> int:
+        """Add a block and return its start offset."""
+        start = self.offsets[-1] + len(self.blocks[-1]) + 1 if self.blocks else 0
+        self.blocks.append(text)
+        self.offsets.append(start)
+        return start
+
+    def slice(self, start: int, end: int) -> str:
+        """Text between two offsets, joining the blocks it spans with newlines."""
+        index = bisect_right(self.offsets, start) - 1
+        pieces = []
+        while index < len(self.blocks) and self.offsets[index] < end:
+            offset = self.offsets[index]
+            pieces.append(self.blocks[index][max(start - offset, 0):end - offset])
+            index += 1
+        return "\n".join(pieces)
+
+
+class Chunk:
+    __slots__ = ("buffer", "page", "start", "end", "section", "repeat")
+
+    def __init__(self, buffer: TextBuffer, page: int, start: int, end: int, section: Optional[str] = None,
+                 repeat: bool = False):
+        """A chunk as offsets into its file's text buffer rather than a copy of the text.
+
+        Args:
+            buffer (TextBuffer): Buffer holding the file's text
+            page (int): Id of the page the chunk starts on
+            start (int): Start offset in the buffer
+            end (int): End offset in the buffer
+            section (Optional[str]): Heading of the section the chunk belongs to
+            repeat (bool): Prefix the text with the section heading (continuation chunks)
+        """
+        self.buffer = buffer
+        self.page = page
+        self.start = start
+        self.end = end
+        self.section = section
+        self.repeat = repeat
+
+    @property
+    def text(self) -> str:
+        body = self.buffer.slice(self.start, self.end)
+        return f"{self.section}\n{body}" if self.repeat else body
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        metadata = dict(self.buffer.pages[self.page])
+        if self.section:
+            metadata["section"] = self.section
+        return metadata
+
+    def to_document(self) -> Document:
+        """Materialize the chunk as a LangChain Document."""
+        return Document(page_content=self.text, metadata=self.metadata)
+
+
+class StructuredChunker:
+    def __init__(self, max_tokens: int = 400, min_tokens: int = 60, model: str = "text-embedding-ada-002",
+                 repeat_heading: bool = True):
+        """Split PDF pages into token-sized chunks along the document's structure.
+
+        Pages are segmented into headings, numbered procedures, code/CLI/JSON
+        blocks and prose. Blocks are packed into chunks of at most `max_tokens`
+        without being cut, a heading always starts a new chunk (a run of
+        heading-like lines starts one together), and a block is only split if
+        it alone exceeds the budget (code by lines, prose by sentences). No
+        text is dropped, not even a heading with nothing under it. A section
+        may continue onto the next page; the chunk keeps the page it starts
+        on. Instead of character overlap, continuation chunks of a section
+        repeat its heading.
+
+        Chunks are produced as `Chunk` records pointing into one text buffer
+        per file, and only become Documents when handed to LangChain.
+
+        Args:
+            max_tokens (int): Token budget per chunk
+            min_tokens (int): Chunks smaller than this are merged into the next one
+                when that doesn't cross a heading
+            model (str): Model whose tokenizer sizes the chunks
+            repeat_heading (bool): Prefix continuation chunks with their section heading
+        """
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        self.repeat_heading = repeat_heading
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def split_documents(self, pages: List[Document]) -> List[Document]:
+        """Chunk the pages of one file into Documents.
+
+        Args:
+            pages (List[Document]): One Document per page, with "source" and "page" metadata
+
+        Returns:
+            List[Document]: Chunks with the source, starting page and section heading
+        """
+        return [chunk.to_document() for chunk in self.split_pages(pages)]
+
+    def split_pages(self, pages: List[Document]) -> List[Chunk]:
+        """Chunk the pages of one file, in page order, into offset records.
+
+        The pages' normalized text is collected into one shared buffer; the
+        page Documents can be released once this returns.
+
+        Args:
+            pages (List[Document]): One Document per page, with "source" and "page" metadata
+
+        Returns:
+            List[Chunk]: Chunks referring to a shared buffer of the file's text
+        """
+        buffer = TextBuffer([page.metadata for page in pages])
+        chunks: List[Chunk] = []
+        heading: Optional[str] = None
+        # The open chunk: buffer range, starting page, token count and whether it has more than headings
+        start: Optional[int] = None
+        end = page_id = tokens = 0
+        repeat = has_body = False
+
+        def flush() -> None:
+            nonlocal start
+            if start is not None:
+                chunks.append(Chunk(buffer, page_id, start, end, heading, repeat))
+            start = None
+
+        for index, page in enumerate(pages):
+            for kind, text in self._blocks(page.page_content):
+                block_start = buffer.append(text)
+                if kind == HEADING:
+                    text_tokens = self.count_tokens(text)
+                    # Consecutive heading-like lines ("Valid values", "Enabled", "Disabled")
+                    # stay together with the text that follows them
+                    if start is not None and (has_body or tokens + text_tokens > self.max_tokens):
+                        flush()
+                    if start is None:
+                        start, page_id, tokens, repeat = block_start, index, 0, False
+                    heading = text
+                    end = block_start + len(text)
+                    tokens += text_tokens
+                    has_body = False
+                    continue
+                # Leave room for the heading repeated at the top of continuation chunks
+                heading_tokens = self.count_tokens(heading) if heading and self.repeat_heading else 0
+                for piece_start, piece_end, piece_tokens in self._fit(kind, text, max(self.max_tokens - heading_tokens, 1)):
+                    if start is not None and tokens + piece_tokens > self.max_tokens:
+                        flush()
+                    if start is None:
+                        start, page_id = block_start + piece_start, index
+                        repeat = bool(heading and self.repeat_heading)
+                        tokens = heading_tokens if repeat else 0
+                    end = block_start + piece_end
+                    tokens += piece_tokens
+                    has_body = True
+        flush()
+        return self._merge_small(chunks)
+
+    def _blocks(self, text: str) -> List[Tuple[str, str]]:
+        """Segment a page into (kind, text) blocks."""
+        blocks: List[Tuple[str, str]] = []
+        kind, lines = None, []
+        depth = 0
+        paragraph_ended = True
+
+        def close() -> None:
+            nonlocal kind, lines
+            if lines:
+                joiner = " " if kind == PROSE else "\n"
+                blocks.append((kind, joiner.join(line.strip() if kind == PROSE else line.rstrip() for line in lines)))
+            kind, lines = None, []
+
+        for line in text.splitlines():
+            stripped = line.strip()
+            ended, paragraph_ended = paragraph_ended, False
+            if not stripped:
+                # Blank lines end paragraphs, but not JSON documents still open
+                if kind != CODE or depth <= 0:
+                    close()
+                continue
+            if kind == CODE and depth > 0:
+                lines.append(line)
+                depth += stripped.count("{") + stripped.count("[") - stripped.count("}") - stripped.count("]")
+                continue
+            if CODE_PATTERN.match(line):
+                if kind != CODE:
+                    close()
+                    kind = CODE
+                lines.append(line)
+                depth = max(depth, 0) + stripped.count("{") + stripped.count("[") - stripped.count("}") - stripped.count("]")
+                continue
+            if STEP_PATTERN.match(line):
+                if kind != STEPS:
+                    close()
+                    kind = STEPS
+                lines.append(line)
+                continue
+            if kind == STEPS and not line[:1].isspace() and lines and not lines[-1].rstrip().endswith((".", ":")):
+                # Wrapped continuation of the current step
+                lines.append(line)
+                continue
+            if (len(stripped) <= 60 and HEADING_PATTERN.match(stripped) and not stripped.endswith((".", ",", ";"))
+                    and (kind != PROSE or ended)):
+                close()
+                blocks.append((HEADING, stripped))
+                continue
+            if kind != PROSE:
+                close()
+                kind = PROSE
+            lines.append(line)
+            paragraph_ended = stripped.endswith((".", "!", "?", ":"))
+            if paragraph_ended and len(stripped) < 60:
+                # A short line ending a sentence usually ends the paragraph in PDF text
+                close()
+        close()
+        return blocks
+
+    def _fit(self, kind: str, text: str, budget: int) -> List[Tuple[int, int, int]]:
+        """Split a block that exceeds the budget: code and steps by lines, prose by sentences.
+
+        Returns:
+            List[Tuple[int, int, int]]: (start, end, tokens) of each piece within the block
+        """
+        tokens = self.count_tokens(text)
+        if tokens <= budget:
+            return [(0, len(text), tokens)]
+        separator = re.compile("\n") if kind in (CODE, STEPS) else SENTENCE_END
+        bounds = [0] + [i for match in separator.finditer(text) for i in match.span()] + [len(text)]
+        pieces: List[Tuple[int, int, int]] = []
+        current: Optional[Tuple[int, int, int]] = None
+
+        def close(piece: Tuple[int, int, int]) -> None:
+            # Token cuts fall next to spaces; keep them out of the piece
+            start, end, tokens = piece
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+            pieces.append((start, end, tokens))
+
+        for unit_start, unit_end in zip(bounds[::2], bounds[1::2]):
+            unit_tokens = self.count_tokens(text[unit_start:unit_end])
+            if unit_tokens > budget:
+                # A single line or sentence over budget is cut by tokens
+                ids = self.encoding.encode(text[unit_start:unit_end], disallowed_special=())
+                _, offsets = self.encoding.decode_with_offsets(ids)
+                cuts = [unit_start + offsets[i] for i in range(budget, len(ids), budget)]
+                edges = [unit_start] + cuts + [unit_end]
+                units = [(a, b, min(budget, unit_tokens - i * budget)) for i, (a, b) in enumerate(zip(edges, edges[1:]))]
+            else:
+                units = [(unit_start, unit_end, unit_tokens)]
+            for piece in units:
+                if current and current[2] + piece[2] > budget:
+                    close(current)
+                    current = None
+                current = (current[0], piece[1], current[2] + piece[2]) if current else piece
+        if current:
+            close(current)
+        return pieces
+
+    def _merge_small(self, chunks: List[Chunk]) -> List[Chunk]:
+        """Fold undersized chunks into the following chunk of the same section and source."""
+        merged: List[Chunk] = []
+        for chunk in chunks:
+            previous = merged[-1] if merged else None
+            if (previous is not None
+                    and self.count_tokens(previous.text) < self.min_tokens
+                    and previous.buffer.pages[previous.page].get("source") == chunk.buffer.pages[chunk.page].get("source")
+                    and previous.section == chunk.section
+                    and self.count_tokens(previous.text) + self.count_tokens(chunk.text) <= self.max_tokens):
+                # Neighbouring chunks are adjacent in the buffer, so the merge just widens the range
+                previous.end = chunk.end
+            else:
+                merged.append(chunk)
+        return merged
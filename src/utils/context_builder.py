@@ -0,0 +1,91 @@
+from typing import List, Optional, Tuple
+from langchain.schema import Document
+import tiktoken
+
+
+class ContextBuilder:
+    def __init__(self, max_tokens: int = 2000, model: str = "gpt-3.5-turbo", separator: str = "\n\n",
+                 max_overlap: int = 400, min_overlap: int = 20):
+        """Pack retrieved chunks into a prompt context under a token budget.
+
+        Args:
+            max_tokens (int): Token budget for the packed context
+            model (str): Model whose tokenizer counts the tokens
+            separator (str): Text placed between passages
+            max_overlap (int): Longest shared prefix/suffix, in characters, merged between chunks
+            min_overlap (int): Shortest shared text treated as splitter overlap rather than coincidence
+        """
+        self.max_tokens = max_tokens
+        self.separator = separator
+        self.max_overlap = max_overlap
+        self.min_overlap = min_overlap
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens with the model's tokenizer."""
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def build(self, docs_and_scores: List[Tuple[Document, float]]) -> Tuple[str, List[Tuple[Document, float]], int]:
+        """Deduplicate, merge overlapping chunks and pack the best passages into the budget.
+
+        Chunks from the same page that share text through the splitter's
+        overlap are joined into one passage, so the shared text is sent once.
+        Passages are then added best score first, skipping any that no longer fit.
+
+        Args:
+            docs_and_scores (List[Tuple[Document, float]]): Retrieved chunks, any order
+
+        Returns:
+            Tuple[str, List[Tuple[Document, float]], int]: Context text, the passages used
+                (best first) and the context's token count
+        """
+        passages = self._merge(sorted(docs_and_scores, key=lambda item: item[1], reverse=True))
+
+        packed, texts, used = [], [], 0
+        separator_tokens = self.count_tokens(self.separator)
+        for doc, score in passages:
+            tokens = self.count_tokens(doc.page_content) + (separator_tokens if texts else 0)
+            if used + tokens > self.max_tokens:
+                continue
+            packed.append((doc, score))
+            texts.append(doc.page_content)
+            used += tokens
+        return self.separator.join(texts), packed, used
+
+    def _merge(self, docs_and_scores: List[Tuple[Document, float]]) -> List[Tuple[Document, float]]:
+        """Drop duplicate or contained chunks and join chunks that overlap, keeping the best score."""
+        passages: List[Tuple[Document, float]] = []
+        for doc, score in docs_and_scores:
+            text = doc.page_content
+            for i, (passage, passage_score) in enumerate(passages):
+                if not self._same_page(passage, doc):
+                    continue
+                merged = self._join(passage.page_content, text)
+                if merged is not None:
+                    passages[i] = (Document(page_content=merged, metadata=passage.metadata), passage_score)
+                    break
+            else:
+                passages.append((doc, score))
+        return passages
+
+    def _join(self, a: str, b: str) -> Optional[str]:
+        """Combine two chunk texts if one contains the other or they overlap; else None."""
+        if b in a:
+            return a
+        if a in b:
+            return b
+        for first, second in ((a, b), (b, a)):
+            longest = min(len(first), len(second), self.max_overlap)
+            for size in range(longest, self.min_overlap - 1, -1):
+                if first.endswith(second[:size]):
+                    return first + second[size:]
+        return None
+
+    @staticmethod
+    def _same_page(a: Document, b: Document) -> bool:
+        """Chunks can only share splitter overlap if they come from the same page."""
+        return (a.metadata.get("source") == b.metadata.get("source")
+                and a.metadata.get("page") == b.metadata.get("page"))
@@ -1,46 +1,423 @@
-from typing import List
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 from pathlib import Path
-from langchain_community.document_loaders import PyPDFLoader, UnstructuredPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import BrokenExecutor, TimeoutError as FutureTimeoutError
+from pypdf import PdfReader, PdfWriter
+from langchain_community.document_loaders import UnstructuredPDFLoader
 from langchain.schema import Document
+from src.utils.boilerplate import strip_boilerplate
+from src.utils.categories import categorize
+from src.utils.chunker import StructuredChunker
+from src.utils.parse_cache import ParseCache
+from src.utils.quarantine import Quarantine
+from src.utils.tracing import tracer
+import os
+import signal
+import tempfile
+import threading
+import time
+
+# UnstructuredPDFLoader is roughly this many times slower than pypdf per page
+SLOW_EXTRACTOR_FACTOR = 10
+
+
+class PageTimeout(Exception):
+    pass
+
+
+@contextmanager
+def _time_limit(seconds: Optional[float]):
+    """Raise PageTimeout if the block runs longer than `seconds`.
+
+    Uses SIGALRM, so it is only enforced in a process's main thread (as in
+    ProcessPoolExecutor workers) on platforms that have it.
+    """
+    if not seconds or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def on_timeout(signum, frame):
+        raise PageTimeout(f"Page took longer than {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _extract_pages(path: str, start: int, end: int,
+                   page_timeout: Optional[float] = None) -> Tuple[List[Document], List[int]]:
+    """Extract pages [start, end) of a PDF, one Document per page.
+
+    Module-level so it can be pickled into worker processes. Metadata matches
+    what PyPDFLoader produces. Pages that raise or exceed `page_timeout` are
+    returned as failed instead of failing the range.
+
+    Returns:
+        Tuple[List[Document], List[int]]: Extracted pages and the numbers of failed pages
+    """
+    return _read_pages(PdfReader(path), path, start, end, page_timeout)
+
+
+def _open_and_extract(path: str, end: int,
+                      page_timeout: Optional[float] = None) -> Tuple[Optional[int], List[Document], List[int]]:
+    """Count a PDF's pages and extract the first range [0, end) in one task.
+
+    Opening a malformed PDF can hang or crash pypdf, so it happens in the
+    worker where the file's time budget and crash handling apply.
+
+    Returns:
+        Tuple[Optional[int], List[Document], List[int]]: Page count (None if pypdf can't
+            open the file), extracted pages and the numbers of failed pages
+    """
+    try:
+        reader = PdfReader(path)
+        page_count = len(reader.pages)
+    except Exception:
+        return None, [], []
+    docs, failed = _read_pages(reader, path, 0, min(end, page_count), page_timeout)
+    return page_count, docs, failed
+
+
+def _read_pages(reader: PdfReader, path: str, start: int, end: int,
+                page_timeout: Optional[float]) -> Tuple[List[Document], List[int]]:
+    docs, failed = [], []
+    for i in range(start, end):
+        try:
+            with _time_limit(page_timeout):
+                text = reader.pages[i].extract_text()
+        except Exception:
+            failed.append(i)
+            continue
+        docs.append(Document(page_content=text, metadata={"source": path, "page": i}))
+    return docs, failed
+
+
+def _extract_pages_unstructured(path: str, pages: List[int],
+                                page_timeout: Optional[float] = None) -> Tuple[List[Document], List[int]]:
+    """Extract single pages with the slower UnstructuredPDFLoader.
+
+    Each page is copied into its own one-page PDF first, so only the pages
+    pypdf couldn't read pay for the slow extractor.
+
+    Returns:
+        Tuple[List[Document], List[int]]: Extracted pages and the numbers of pages lost
+    """
+    reader = PdfReader(path)
+    docs, lost = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in pages:
+            page_path = os.path.join(tmp, f"page-{i}.pdf")
+            try:
+                with _time_limit(page_timeout):
+                    writer = PdfWriter()
+                    writer.add_page(reader.pages[i])
+                    writer.write(page_path)
+                    parts = UnstructuredPDFLoader(page_path).load()
+            except Exception:
+                lost.append(i)
+                continue
+            text = "\n\n".join(part.page_content for part in parts)
+            docs.append(Document(page_content=text, metadata={"source": path, "page": i}))
+    return docs, lost
+
+
+def _extract_unstructured(path: str) -> List[Document]:
+    """Extract a whole PDF with the slower UnstructuredPDFLoader."""
+    return UnstructuredPDFLoader(path).load()
+
 
 class DocumentLoader:
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
-        """Initialize the document loader with chunking parameters."""
-        self.chunk_size = chunk_size
-        self.chunk_overlap = chunk_overlap
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-        )
+    def __init__(self, chunk_tokens: int = 400, min_chunk_tokens: int = 60,
+                 max_workers: int = 1, pages_per_task: int = 200,
+                 parse_cache: Optional[str] = ".cache/parsed_text.sqlite3",
+                 page_timeout: Optional[float] = 10.0, file_timeout: Optional[float] = 600.0,
+                 file_timeout_per_page: float = 1.0,
+                 quarantine: Optional[str] = ".cache/quarantine.json", remove_boilerplate: bool = True):
+        """Initialize the document loader with chunking and parsing parameters.
+
+        Args:
+            chunk_tokens (int): Maximum tokens per chunk; chunks follow headings,
+                procedures and code blocks instead of overlapping
+            min_chunk_tokens (int): Smaller chunks are merged into the next one in their section
+            max_workers (int): Worker processes used to parse PDFs; with 1 and no
+                timeouts, parsing runs in-process
+            pages_per_task (int): Pages handed to a worker at a time, so large
+                files are split across workers
+            parse_cache (Optional[str]): SQLite file caching extracted page text by file
+                content, so unchanged PDFs are not parsed again; None disables the cache
+            page_timeout (Optional[float]): Seconds pypdf may spend on one page before the
+                page is handed to UnstructuredPDFLoader; None disables the limit
+            file_timeout (Optional[float]): Base seconds one file may take in total before its
+                worker is killed and the file is quarantined; None disables the limit
+            file_timeout_per_page (float): Seconds added to `file_timeout` per page, so large
+                references get a proportionally larger budget
+            quarantine (Optional[str]): JSON file listing PDFs that hung or crashed the
+                parser; they are skipped until they change. None disables the list
+            remove_boilerplate (bool): Strip running headers, footers and other lines
+                repeated across a file's pages before chunking
+        """
+        self.chunk_tokens = chunk_tokens
+        self.max_workers = max_workers
+        self.pages_per_task = pages_per_task
+        self.parse_cache = ParseCache(parse_cache) if parse_cache else None
+        self.page_timeout = page_timeout
+        self.file_timeout = file_timeout
+        self.file_timeout_per_page = file_timeout_per_page
+        self.quarantine = Quarantine(quarantine) if quarantine else None
+        self.chunker = StructuredChunker(max_tokens=chunk_tokens, min_tokens=min_chunk_tokens)
+        self.remove_boilerplate = remove_boilerplate
+        # File name -> boilerplate lines removed from it, with the number of pages each was on
+        self.boilerplate_report: Dict[str, Dict[str, int]] = {}
 
     def load_pdfs(self, directory: str) -> List[Document]:
         """Load all PDFs from a directory and split them into chunks."""
-        docs = []
-        pdf_dir = Path(directory)
-        
-        # Load each PDF file
-        for pdf_file in pdf_dir.glob("*.pdf"):
+        return list(self.iter_chunks(directory))
+
+    def iter_chunks(self, directory: str) -> Iterator[Document]:
+        """Yield chunks of all PDFs in a directory, one file at a time.
+
+        Pages are held only for the file being split and the files being
+        parsed ahead of it (up to `max_workers`), so the output can be fed
+        into batched embedding without first loading every PDF. A file's
+        chunks are kept as offsets into its text and turned into Documents one
+        at a time as they are consumed. The vector store still keeps every
+        chunk's text (docstore and BM25 index), so ingest memory grows with
+        the corpus, just without the pages and Documents on top.
+        """
+        page_count = 0
+        chunk_count = 0
+        for pdf_file, file_docs in self._iter_parsed_files(sorted(Path(directory).glob("*.pdf"))):
+            if not file_docs:
+                continue
+            with tracer.span("split", file=pdf_file.name) as span:
+                if self.remove_boilerplate:
+                    removed = strip_boilerplate(file_docs)
+                    self.boilerplate_report[pdf_file.name] = removed
+                    span["boilerplate_lines"] = sum(removed.values())
+                    if removed:
+                        top = sorted(removed, key=removed.get, reverse=True)[:3]
+                        print(f"🧹 Stripped {sum(removed.values())} boilerplate lines from {pdf_file.name} "
+                              f"({len(removed)} distinct, e.g. {', '.join(repr(line) for line in top)})")
+                chunks = self.chunker.split_pages(file_docs)
+                span["chunks"] = len(chunks)
+            page_count += len(file_docs)
+            chunk_count += len(chunks)
+            # _iter_parsed_files still refers to this list while it is suspended, so
+            # empty it rather than just dropping the name to free the pages now
+            file_docs.clear()
+            for chunk in chunks:
+                doc = chunk.to_document()
+                # Category tags let searches be narrowed to a topic
+                categories = categorize(str(doc.metadata.get("source", "")), doc.page_content)
+                doc.metadata["category"] = categories[0]
+                doc.metadata["categories"] = categories
+                yield doc
+        if page_count:
+            print(f"📄 Split {page_count} documents into {chunk_count} chunks")
+
+    def _executor(self) -> Executor:
+        """Create the pool used for parsing; timeouts need worker processes that can be killed."""
+        if self.max_workers > 1 or self.page_timeout or self.file_timeout:
+            return ProcessPoolExecutor(max_workers=max(self.max_workers, 1))
+        return ThreadPoolExecutor(max_workers=1)
+
+    @staticmethod
+    def _abandon(pool: Executor) -> None:
+        """Shut a pool down without waiting for it, killing its worker processes."""
+        processes = list((getattr(pool, "_processes", None) or {}).values())
+        for process in processes:
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _iter_parsed_files(self, pdf_files: List[Path]) -> Iterator[Tuple[Path, Optional[List[Document]]]]:
+        """Parse PDFs into page Documents, splitting large files by page range.
+
+        Yields (file, pages) in input order; pages is None for a file that
+        could not be loaded by either extractor. Up to `max_workers` files
+        after the current one are submitted before it is collected, so
+        workers stay busy even when a file is smaller than a page range.
+        Files whose content is in the parse cache are not parsed at all.
+
+        A file that exceeds its time budget is quarantined; the pool is
+        replaced so the stuck worker can't hold up the files after it. A dead
+        worker fails every pending task, including those of the files queued
+        behind, so after a crash the file is re-run alone on a fresh pool and
+        only quarantined if it crashes that one too.
+        """
+        if self.quarantine:
+            skipped = [pdf_file for pdf_file in pdf_files if self.quarantine.contains(pdf_file)]
+            for pdf_file in skipped:
+                print(f"⏭️ Skipping quarantined {pdf_file.name}")
+            pdf_files = [pdf_file for pdf_file in pdf_files if pdf_file not in skipped]
+
+        pool = self._executor()
+        remaining = iter(pdf_files)
+        pending = deque()
+
+        def submit(pdf_file: Path, cached: Optional[List[Document]]) -> Tuple:
+            if cached is not None:
+                return pdf_file, cached, None
+            try:
+                return pdf_file, None, self._submit_file(pool, pdf_file)
+            except BrokenExecutor as e:
+                # The pool died under another file; collecting this one retries it on a fresh pool
+                failed = Future()
+                failed.set_exception(e)
+                return pdf_file, None, failed
+
+        def fill() -> None:
+            # Keep max_workers files queued behind the one being collected
+            while len(pending) < max(self.max_workers, 1):
+                pdf_file = next(remaining, None)
+                if pdf_file is None:
+                    return
+                pending.append(submit(pdf_file, self.parse_cache.get(pdf_file) if self.parse_cache else None))
+
+        try:
+            fill()
+            while pending:
+                pdf_file, docs, first = pending.popleft()
+                fill()
+                # Time spent waiting for this file; the ones after it are already parsing
+                with tracer.span("parse", file=pdf_file.name, cached=docs is not None) as span:
+                    if docs is not None:
+                        print(f"✅ Loaded {pdf_file.name} from the parse cache")
+                    else:
+                        try:
+                            docs, complete = self._collect_file(pool, pdf_file, first)
+                        except (FutureTimeoutError, BrokenExecutor) as e:
+                            # A stuck task can't be cancelled, so replace the pool
+                            self._abandon(pool)
+                            pool = self._executor()
+                            docs, complete = None, False
+                            reason = "timed out" if isinstance(e, FutureTimeoutError) else None
+                            if reason is None:
+                                # The crash may have come from the next file's tasks; retry this one alone
+                                print(f"⚠️ Parser crashed while loading {pdf_file.name}; retrying it alone")
+                                try:
+                                    docs, complete = self._collect_file(pool, pdf_file,
+                                                                        self._submit_file(pool, pdf_file))
+                                except (FutureTimeoutError, BrokenExecutor) as retry_error:
+                                    reason = ("timed out" if isinstance(retry_error, FutureTimeoutError)
+                                              else "crashed the parser")
+                                    self._abandon(pool)
+                                    pool = self._executor()
+                            if reason:
+                                print(f"❌ {pdf_file.name} {reason}; quarantined")
+                                span["error"] = reason
+                                if self.quarantine:
+                                    self.quarantine.add(pdf_file, reason)
+                            # Queued files' tasks died with the old pool
+                            pending = deque(submit(queued, cached) for queued, cached, _ in pending)
+                        # Pages lost to a timeout may extract next time, so only cache complete files
+                        if docs and complete and self.parse_cache:
+                            self.parse_cache.put(pdf_file, docs)
+                    span["pages"] = len(docs) if docs else 0
+                yield pdf_file, docs
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit_file(self, pool: Executor, pdf_file: Path) -> Future:
+        """Submit the task that opens a file and extracts its first page range.
+
+        The rest of the file is submitted by `_collect_file` once the page
+        count is known.
+        """
+        return pool.submit(_open_and_extract, str(pdf_file), self.pages_per_task, self.page_timeout)
+
+    def _collect_file(self, pool: Executor, pdf_file: Path, first: Future) -> Tuple[Optional[List[Document]], bool]:
+        """Gather a file's page ranges, sending only failed pages to UnstructuredPDFLoader.
+
+        Raises concurrent.futures.TimeoutError once the file exceeds `file_timeout`
+        (plus `file_timeout_per_page` per page once the page count is known),
+        and BrokenExecutor if a worker died.
+
+        Returns:
+            Tuple[Optional[List[Document]], bool]: Pages in order (None if nothing could be
+                extracted) and whether every page was extracted
+        """
+        deadline = time.monotonic() + self.file_timeout if self.file_timeout else None
+
+        def time_left() -> Optional[float]:
+            return max(deadline - time.monotonic(), 0) if deadline else None
+
+        try:
+            page_count, docs, failed = first.result(timeout=time_left())
+        except (FutureTimeoutError, BrokenExecutor):
+            raise
+        except Exception:
+            page_count, docs, failed = None, [], []
+
+        if page_count is None:
+            # pypdf can't open the file at all; try UnstructuredPDFLoader on the whole file
+            print(f"PyPDF failed for {pdf_file.name}, trying UnstructuredPDFLoader...")
             try:
-                # Try PyPDFLoader first
-                try:
-                    loader = PyPDFLoader(str(pdf_file))
-                    docs.extend(loader.load())
-                    print(f"✅ Loaded {pdf_file.name} using PyPDFLoader")
-                except Exception as e:
-                    # If PyPDFLoader fails, try UnstructuredPDFLoader
-                    print(f"PyPDFLoader failed for {pdf_file.name}, trying UnstructuredPDFLoader...")
-                    loader = UnstructuredPDFLoader(str(pdf_file))
-                    docs.extend(loader.load())
-                    print(f"✅ Loaded {pdf_file.name} using UnstructuredPDFLoader")
+                docs = pool.submit(_extract_unstructured, str(pdf_file)).result(timeout=time_left())
+            except (FutureTimeoutError, BrokenExecutor):
+                raise
             except Exception as e:
                 print(f"❌ Error loading {pdf_file.name}: {str(e)}")
-                continue
-        
-        # Split documents into chunks
-        if docs:
-            chunks = self.text_splitter.split_documents(docs)
-            print(f"📄 Split {len(docs)} documents into {len(chunks)} chunks")
-            return chunks
-        return [] 
\ No newline at end of file
+                return None, False
+            print(f"✅ Loaded {pdf_file.name} using UnstructuredPDFLoader")
+            return docs, True
+
+        if deadline:
+            deadline += page_count * self.file_timeout_per_page
+        ranges = [(start, min(start + self.pages_per_task, page_count))
+                  for start in range(self.pages_per_task, page_count, self.pages_per_task)]
+        futures = [
+            (start, end, pool.submit(_extract_pages, str(pdf_file), start, end, self.page_timeout))
+            for start, end in ranges
+        ]
+        for start, end, future in futures:
+            try:
+                range_docs, range_failed = future.result(timeout=time_left())
+            except (FutureTimeoutError, BrokenExecutor):
+                raise
+            except Exception:
+                # The worker couldn't read this range at all; retry each of its pages
+                range_docs, range_failed = [], list(range(start, end))
+            docs.extend(range_docs)
+            failed.extend(range_failed)
+
+        lost = []
+        if failed:
+            print(f"PyPDF failed on {len(failed)} pages of {pdf_file.name}, trying UnstructuredPDFLoader on them...")
+            slow_timeout = self.page_timeout * SLOW_EXTRACTOR_FACTOR if self.page_timeout else None
+            recovered, lost = pool.submit(_extract_pages_unstructured, str(pdf_file), failed,
+                                          slow_timeout).result(timeout=time_left())
+            docs.extend(recovered)
+            docs.sort(key=lambda doc: doc.metadata["page"])
+            if lost:
+                print(f"⚠️ Skipped unreadable pages of {pdf_file.name}: {', '.join(str(i + 1) for i in lost)}")
+
+        if not docs:
+            print(f"❌ Error loading {pdf_file.name}: no readable pages")
+            return None, False
+        print(f"✅ Loaded {pdf_file.name} using PyPDF")
+        return docs, not lost
+
+    def corpus_fingerprint(self, directory: str) -> Dict[str, Dict[str, Any]]:
+        """Describe the PDFs in a directory by name, size and modification time, plus the chunking settings.
+
+        Cheap enough to compute on every start-up; used to decide whether a
+        saved vector store still matches the corpus on disk and the chunks
+        this loader would produce from it.
+        """
+        fingerprint = {
+            "chunking": {"chunk_tokens": self.chunk_tokens, "min_chunk_tokens": self.chunker.min_tokens,
+                         "remove_boilerplate": self.remove_boilerplate},
+        }
+        for pdf_file in sorted(Path(directory).glob("*.pdf")):
+            stat = pdf_file.stat()
+            fingerprint[pdf_file.name] = {
+                "size": stat.st_size,
+                "mtime": int(stat.st_mtime),
+            }
+        return fingerprint
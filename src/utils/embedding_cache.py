@@ -0,0 +1,181 @@
+from typing import Dict, List, Optional
+from array import array
+from langchain.embeddings.base import Embeddings
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Cache hits recorded before their last_used timestamps are written
+TOUCH_BATCH = 1000
+
+
+class CachedEmbeddings(Embeddings):
+    def __init__(self, embeddings: Embeddings, path: str = ".cache/embeddings.sqlite3",
+                 max_entries: int = 500_000, model: Optional[str] = None):
+        """Wrap an embeddings model with a persistent SQLite cache.
+
+        Entries are keyed by SHA-256 of the model name and text, so switching
+        models never returns stale vectors. Vectors are stored as float32 blobs.
+
+        Args:
+            embeddings (Embeddings): Underlying embeddings model
+            path (str): SQLite file holding the cache
+            max_entries (int): Entries kept before least-recently-used ones are evicted
+            model (Optional[str]): Model name for the cache key; read from `embeddings.model` if omitted
+        """
+        self.embeddings = embeddings
+        self.model = model or getattr(embeddings, "model", None) or type(embeddings).__name__
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        # Hit timestamps not yet written; flushed in batches rather than on every lookup
+        self.touched: Dict[str, float] = {}
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self.conn.commit()
+        # Row count kept in memory so inserts don't scan the table; an upper bound, since a
+        # replaced key is counted again, and recounted before anything is evicted
+        self.entries = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, calling the model only for texts not in the cache."""
+        vectors = self.lookup(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            new_vectors = self.embeddings.embed_documents([texts[i] for i in missing])
+            self.store([texts[i] for i in missing], new_vectors)
+            for i, vector in zip(missing, new_vectors):
+                vectors[i] = vector
+        return vectors
+
+    def lookup(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Return the cached vector of each text, or None where it is not cached.
+
+        Lets callers such as `EmbeddingScheduler` send only the misses to the
+        model (and spend rate budget only on them); store the results with `store`.
+        """
+        keys = [self._key(text) for text in texts]
+        cached = self._get(keys)
+        with self.lock:
+            self.hits += sum(key in cached for key in keys)
+            self.misses += sum(key not in cached for key in keys)
+        return [list(cached[key]) if key in cached else None for key in keys]
+
+    def store(self, texts: List[str], vectors: List[List[float]]) -> None:
+        """Cache vectors computed for texts."""
+        self._put({self._key(text): vector for text, vector in zip(texts, vectors)})
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, using the cache if the same text was embedded before."""
+        key = self._key(text)
+        cached = self._get([key])
+        if key in cached:
+            with self.lock:
+                self.hits += 1
+            return list(cached[key])
+        with self.lock:
+            self.misses += 1
+        vector = self.embeddings.embed_query(text)
+        self._put({key: vector})
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Async version of `embed_documents`; SQLite runs in a worker thread, only misses await the model."""
+        vectors = await asyncio.to_thread(self.lookup, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            new_vectors = await self.embeddings.aembed_documents([texts[i] for i in missing])
+            await asyncio.to_thread(self.store, [texts[i] for i in missing], new_vectors)
+            for i, vector in zip(missing, new_vectors):
+                vectors[i] = vector
+        return vectors
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async version of `embed_query`; SQLite runs in a worker thread."""
+        vector = (await asyncio.to_thread(self.lookup, [text]))[0]
+        if vector is not None:
+            return vector
+        vector = await self.embeddings.aembed_query(text)
+        await asyncio.to_thread(self.store, [text], [vector])
+        return vector
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current number of cached entries."""
+        with self.lock:
+            self.entries = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": self.entries,
+            }
+
+    def _key(self, text: str) -> str:
+        """Cache key for a text under the current model."""
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _get(self, keys: List[str]) -> Dict[str, array]:
+        """Fetch cached vectors and mark them as recently used."""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self.lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(unique_keys), 500):
+                part = unique_keys[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector
+            now = time.time()
+            self.touched.update((key, now) for key in found)
+            if len(self.touched) >= TOUCH_BATCH:
+                self._flush_touched()
+                self.conn.commit()
+        return found
+
+    def _flush_touched(self) -> None:
+        """Write pending last_used updates; the caller holds the lock and commits."""
+        if self.touched:
+            self.conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                  [(now, key) for key, now in self.touched.items()])
+            self.touched = {}
+
+    def _put(self, entries: Dict[str, List[float]]) -> None:
+        """Store vectors and evict least-recently-used entries beyond `max_entries`."""
+        if not entries:
+            return
+        now = time.time()
+        with self.lock:
+            self._flush_touched()
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in entries.items()],
+            )
+            self.entries += len(entries)
+            if self.entries > self.max_entries:
+                self.entries = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if self.entries > self.max_entries:
+                # Evict down to 90% so we don't evict on every insert
+                excess = self.entries - int(self.max_entries * 0.9)
+                deleted = self.conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (excess,)
+                ).rowcount
+                self.entries -= deleted
+            self.conn.commit()
@@ -0,0 +1,181 @@
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import random
+import threading
+import time
+from src.utils.tracing import tracer
+
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    def __init__(self, per_minute: float):
+        """Token bucket that refills continuously at `per_minute` units per minute.
+
+        Args:
+            per_minute (float): Budget per minute; also the bucket capacity
+        """
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: float = 1) -> None:
+        """Block until `amount` units are available, then take them.
+
+        Args:
+            amount (float): Units to take; capped at the bucket capacity
+        """
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                wait = (amount - self.available) / self.rate
+            time.sleep(wait)
+
+
+class EmbeddingScheduler:
+    def __init__(self, embeddings, max_in_flight: int = 4, requests_per_minute: float = 3000,
+                 tokens_per_minute: float = 1_000_000, max_retries: int = 6,
+                 initial_backoff: float = 1.0, max_backoff: float = 60.0, cache=None):
+        """Embed batches concurrently within request and token budgets.
+
+        Args:
+            embeddings: Object with an `embed_documents(texts)` method, e.g. OpenAIEmbeddings
+            max_in_flight (int): Batches sent concurrently
+            requests_per_minute (float): Request budget per minute
+            tokens_per_minute (float): Token budget per minute
+            max_retries (int): Retries per batch on 429/5xx responses
+            initial_backoff (float): First retry delay in seconds, doubled per attempt
+            max_backoff (float): Upper bound on a single retry delay in seconds
+            cache: Optional `CachedEmbeddings` checked before a batch is sent; cached
+                texts neither use the request/token budget nor count as requests
+        """
+        self.embeddings = embeddings
+        self.cache = cache
+        self.max_in_flight = max_in_flight
+        self.request_limiter = RateLimiter(requests_per_minute)
+        self.token_limiter = RateLimiter(tokens_per_minute)
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self._encoding = None
+        self.stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Reset the throughput counters."""
+        self.stats = {"requests": 0, "texts": 0, "tokens": 0, "retries": 0, "cached": 0, "seconds": 0.0}
+
+    def iter_embeddings(self, batches: Iterable[Tuple[List[str], Any]]) -> Iterator[Tuple[List[str], List[List[float]], Any]]:
+        """Embed batches of texts, keeping up to `max_in_flight` requests running.
+
+        Args:
+            batches (Iterable[Tuple[List[str], Any]]): (texts, payload) pairs; payload
+                is passed through untouched so callers can carry ids and metadata
+
+        Yields:
+            Tuple[List[str], List[List[float]], Any]: (texts, vectors, payload) in input order
+        """
+        start = time.monotonic()
+        pending = deque()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+                for texts, payload in batches:
+                    pending.append((texts, payload, pool.submit(self._embed_batch, texts)))
+                    if len(pending) >= self.max_in_flight:
+                        texts, payload, future = pending.popleft()
+                        yield texts, future.result(), payload
+                while pending:
+                    texts, payload, future = pending.popleft()
+                    yield texts, future.result(), payload
+        finally:
+            self.stats["seconds"] += time.monotonic() - start
+
+    def report(self) -> str:
+        """Summarize throughput since the last reset."""
+        seconds = max(self.stats["seconds"], 1e-9)
+        return (f"⚡ Embedded {self.stats['texts']} texts in {self.stats['requests']} requests "
+                f"over {self.stats['seconds']:.1f}s ({self.stats['texts'] / seconds:.1f} texts/s, "
+                f"{self.stats['tokens'] / seconds:.0f} tokens/s, {self.stats['retries']} retries); "
+                f"{self.stats['cached']} texts served from cache")
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens with tiktoken, or estimate at ~4 characters per token if it is unavailable."""
+        if self._encoding is None:
+            try:
+                import tiktoken
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                self._encoding = False
+        if self._encoding:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return len(text) // 4 + 1
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch, sending only the texts missing from the cache."""
+        if self.cache is None:
+            return self._embed_with_retry(texts)
+        vectors = self.cache.lookup(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        with self.stats_lock:
+            self.stats["cached"] += len(texts) - len(missing)
+        if missing:
+            new_vectors = self._embed_with_retry([texts[i] for i in missing])
+            self.cache.store([texts[i] for i in missing], new_vectors)
+            for i, vector in zip(missing, new_vectors):
+                vectors[i] = vector
+        return vectors
+
+    def _embed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch, waiting for budget and retrying transient failures."""
+        tokens = sum(self.count_tokens(text) for text in texts)
+        attempt = 0
+        while True:
+            self.request_limiter.acquire(1)
+            self.token_limiter.acquire(tokens)
+            try:
+                with tracer.span("embed", texts=len(texts), tokens=tokens, retries=attempt):
+                    vectors = self.embeddings.embed_documents(texts)
+            except Exception as e:
+                status = self._status_code(e)
+                if status not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    raise
+                delay = self._retry_after(e)
+                if delay is None:
+                    delay = min(self.max_backoff, self.initial_backoff * (2 ** attempt)) * random.uniform(0.5, 1.0)
+                attempt += 1
+                with self.stats_lock:
+                    self.stats["retries"] += 1
+                time.sleep(delay)
+                continue
+            with self.stats_lock:
+                self.stats["requests"] += 1
+                self.stats["texts"] += len(texts)
+                self.stats["tokens"] += tokens
+            return vectors
+
+    @staticmethod
+    def _status_code(error: Exception) -> Optional[int]:
+        """Extract an HTTP status code from an OpenAI/httpx-style exception."""
+        status = getattr(error, "status_code", None)
+        if status is None:
+            status = getattr(getattr(error, "response", None), "status_code", None)
+        return status
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Read the Retry-After header from an exception's response, if any."""
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
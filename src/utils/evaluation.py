@@ -0,0 +1,193 @@
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+from langchain.schema import Document
+from src.utils.benchmark import percentiles
+from src.utils.faiss_index import SWEEP_VALUES
+import argparse
+import json
+import math
+import os
+import time
+import faiss
+
+# Retrieval quality vs latency on a golden question set.
+# Run with: python -m src.utils.evaluation --directory vector_store --k 10 --sweep
+
+GOLDEN_SET = Path(__file__).with_name("golden_questions.json")
+
+
+def load_golden_set(path: str = str(GOLDEN_SET)) -> List[Dict[str, Any]]:
+    """Load golden questions.
+
+    Each item is `{"question": str, "expected": [target, ...]}`. A target names
+    a `source` PDF and optionally a 0-based `page` and `contains` phrases; a
+    retrieved chunk hits the target if it matches every field given.
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+def matches(doc: Document, target: Dict[str, Any]) -> bool:
+    """Check whether a retrieved chunk satisfies a golden target."""
+    if os.path.basename(str(doc.metadata.get("source", ""))) != target["source"]:
+        return False
+    if "page" in target and doc.metadata.get("page") != target["page"]:
+        return False
+    if "contains" in target:
+        text = doc.page_content.lower()
+        return any(phrase.lower() in text for phrase in target["contains"])
+    return True
+
+
+def score_ranking(docs: List[Document], expected: List[Dict[str, Any]], k: int) -> Dict[str, float]:
+    """Recall@k, reciprocal rank and nDCG@k of one ranked result list.
+
+    Each target counts once, at the first chunk that hits it, so several
+    chunks of the same page don't inflate the scores.
+
+    Args:
+        docs (List[Document]): Retrieved chunks, best first
+        expected (List[Dict[str, Any]]): Golden targets for the question
+        k (int): Cut-off
+
+    Returns:
+        Dict[str, float]: recall, reciprocal_rank and ndcg
+    """
+    found = set()
+    reciprocal_rank = 0.0
+    dcg = 0.0
+    for rank, doc in enumerate(docs[:k], 1):
+        hit = next((i for i, target in enumerate(expected) if i not in found and matches(doc, target)), None)
+        if hit is None:
+            continue
+        found.add(hit)
+        dcg += 1.0 / math.log2(rank + 1)
+        if not reciprocal_rank:
+            reciprocal_rank = 1.0 / rank
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(expected), k) + 1))
+    return {
+        "recall": len(found) / len(expected) if expected else 0.0,
+        "reciprocal_rank": reciprocal_rank,
+        "ndcg": dcg / ideal if ideal else 0.0,
+    }
+
+
+def evaluate(vector_store, golden: List[Dict[str, Any]], k: int = 10,
+             embeddings: Optional[List[List[float]]] = None) -> Dict[str, Any]:
+    """Score `similarity_search` on a golden set and time each query.
+
+    Args:
+        vector_store: Loaded VectorStore
+        golden (List[Dict[str, Any]]): Golden questions, see `load_golden_set`
+        k (int): Results retrieved per question
+        embeddings (Optional[List[List[float]]]): Precomputed query embeddings; when
+            given, latency covers the index search only
+
+    Returns:
+        Dict[str, Any]: Mean recall@k, MRR and nDCG@k, latency percentiles (ms) and per-query rows
+    """
+    rows, latencies = [], []
+    for i, item in enumerate(golden):
+        start = time.perf_counter()
+        if embeddings is None:
+            results = vector_store.similarity_search(item["question"], k=k, score_threshold=None)
+        else:
+            results = vector_store.similarity_search_by_vector(embeddings[i], k=k, score_threshold=None)
+        latencies.append(time.perf_counter() - start)
+        scores = score_ranking([doc for doc, _ in results], item["expected"], k)
+        rows.append({"question": item["question"], "latency_ms": latencies[-1] * 1000, **scores})
+
+    count = max(len(rows), 1)
+    return {
+        "k": k,
+        "queries": len(rows),
+        "recall": sum(row["recall"] for row in rows) / count,
+        "mrr": sum(row["reciprocal_rank"] for row in rows) / count,
+        "ndcg": sum(row["ndcg"] for row in rows) / count,
+        "latency_ms": percentiles(latencies) if latencies else {},
+        "per_query": rows,
+    }
+
+
+def evaluate_sweep(vector_store, golden: List[Dict[str, Any]], k: int = 10) -> List[Dict[str, Any]]:
+    """Evaluate across nprobe / efSearch values to trace the speed-vs-quality curve.
+
+    Query embeddings are computed once up front so latencies compare index
+    searches only. A flat index yields a single point.
+
+    Returns:
+        List[Dict[str, Any]]: One `evaluate` result per setting, tagged with `param` and `value`
+    """
+    query_embeddings = vector_store.embeddings.embed_documents([item["question"] for item in golden])
+    index = vector_store.vector_store.index
+    if faiss.try_extract_index_ivf(index) is not None:
+        param = "nprobe"
+    elif hasattr(index, "hnsw"):
+        param = "ef_search"
+    else:
+        param = None
+
+    points = []
+    original = vector_store.index_config.get(param) if param else None
+    try:
+        for value in (SWEEP_VALUES[param] if param else [None]):
+            if param:
+                vector_store.set_search_params(**{param: value})
+            points.append({"param": param, "value": value, **evaluate(vector_store, golden, k, query_embeddings)})
+    finally:
+        if param:
+            vector_store.set_search_params(**{param: original})
+    return points
+
+
+def format_results(points: List[Dict[str, Any]]) -> str:
+    """Render evaluation points as a small table."""
+    k = points[0]["k"] if points else 0
+    lines = [f"{'setting':<16} {'recall@' + str(k):>10} {'MRR':>7} {'nDCG@' + str(k):>9} {'p50 ms':>8} {'p95 ms':>8}"]
+    for point in points:
+        setting = f"{point['param']}={point['value']}" if point.get("param") else "default"
+        latency = point["latency_ms"]
+        lines.append(f"{setting:<16} {point['recall']:>10.3f} {point['mrr']:>7.3f} {point['ndcg']:>9.3f} "
+                     f"{latency.get('p50', 0.0):>8.2f} {latency.get('p95', 0.0):>8.2f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    from dotenv import load_dotenv
+    from src.utils.vector_store import VectorStore
+
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and latency on a golden question set.")
+    parser.add_argument("--directory", default="vector_store", help="Saved vector store to evaluate")
+    parser.add_argument("--golden", default=str(GOLDEN_SET), help="Golden question set JSON")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--sweep", action="store_true", help="Sweep nprobe / efSearch on ANN indexes")
+    parser.add_argument("--output", default=None, help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    vector_store = VectorStore(os.getenv("OPENAI_API_KEY"))
+    vector_store.load_vector_store(args.directory, mmap=True)
+    golden = load_golden_set(args.golden)
+
+    if args.sweep:
+        points = evaluate_sweep(vector_store, golden, args.k)
+    else:
+        points = [evaluate(vector_store, golden, args.k)]
+    print(f"\n🎯 {len(golden)} golden questions, {vector_store.index_config['type']} index")
+    print(format_results(points))
+
+    misses = [row["question"] for row in points[-1]["per_query"] if not row["recall"]]
+    if misses:
+        print(f"\n❌ No expected source in the top {args.k} for:")
+        for question in misses:
+            print(f"   - {question}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(points, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+    return points
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+from typing import Any, Dict, List
+import math
+import time
+import numpy as np
+import faiss
+
+
+# Index types accepted by build_index
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+DEFAULT_INDEX_CONFIG = {
+    "type": "flat",
+    "nlist": None,      # IVF cells; None picks ~4 * sqrt(n)
+    "pq_m": 64,         # PQ sub-quantizers; adjusted to divide the dimension
+    "hnsw_m": 32,       # HNSW graph neighbours per node
+    "nprobe": 16,       # IVF cells visited per query
+    "ef_search": 128,   # HNSW candidate list size per query
+}
+
+# Parameters that change the stored index; the rest only affect search
+BUILD_PARAMS = ("type", "nlist", "pq_m", "hnsw_m")
+
+# Below this many vectors an approximate index buys nothing and can't be trained well
+MIN_ANN_VECTORS = 1000
+
+SWEEP_VALUES = {
+    "nprobe": [1, 2, 4, 8, 16, 32, 64, 128],
+    "ef_search": [16, 32, 64, 128, 256, 512],
+}
+
+
+def build_params(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the subset of an index config that determines the stored index."""
+    return {key: config.get(key) for key in BUILD_PARAMS}
+
+
+def build_index(vectors: np.ndarray, config: Dict[str, Any]) -> faiss.Index:
+    """Build and train an inner-product index of the configured type.
+
+    Args:
+        vectors (np.ndarray): L2-normalized float32 vectors, one per row
+        config (Dict[str, Any]): Index config (see DEFAULT_INDEX_CONFIG)
+
+    Returns:
+        faiss.Index: Trained index containing `vectors` in row order
+    """
+    index_type = config["type"]
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type}; expected one of {', '.join(INDEX_TYPES)}")
+
+    n, d = vectors.shape
+    if index_type != "flat" and n < MIN_ANN_VECTORS:
+        print(f"Only {n} vectors; using a flat index instead of {index_type}")
+        index_type = "flat"
+
+    nlist = config.get("nlist") or max(1, min(int(4 * math.sqrt(n)), n // 39))
+    if index_type == "flat":
+        factory = "Flat"
+    elif index_type == "ivf_flat":
+        factory = f"IVF{nlist},Flat"
+    elif index_type == "ivf_pq":
+        factory = f"IVF{nlist},PQ{_pq_subquantizers(d, config['pq_m'])}"
+    else:
+        factory = f"HNSW{config['hnsw_m']},Flat"
+
+    index = faiss.index_factory(d, factory, faiss.METRIC_INNER_PRODUCT)
+    if not index.is_trained:
+        start = time.perf_counter()
+        index.train(_training_sample(vectors, nlist))
+        print(f"Trained {factory} index in {time.perf_counter() - start:.1f}s")
+    index.add(vectors)
+    set_search_params(index, config)
+    return index
+
+
+def set_search_params(index: faiss.Index, config: Dict[str, Any]) -> None:
+    """Apply nprobe / efSearch from the config to an index that supports them."""
+    params = faiss.ParameterSpace()
+    if faiss.try_extract_index_ivf(index) is not None and config.get("nprobe"):
+        params.set_index_parameter(index, "nprobe", int(config["nprobe"]))
+    if hasattr(index, "hnsw") and config.get("ef_search"):
+        params.set_index_parameter(index, "efSearch", int(config["ef_search"]))
+
+
+def recall_latency_report(vectors: np.ndarray, index: faiss.Index, config: Dict[str, Any],
+                          k: int = 10, num_queries: int = 200, seed: int = 0) -> Dict[str, Any]:
+    """Measure recall@k and per-query latency of an index against exact search.
+
+    Queries are sampled from the stored vectors themselves. The index's
+    search parameter (nprobe or efSearch) is swept, and the configured
+    value is restored afterwards.
+
+    Args:
+        vectors (np.ndarray): The vectors stored in `index`, in row order
+        index (faiss.Index): Index to evaluate
+        config (Dict[str, Any]): Index config in use
+        k (int): Neighbours compared per query
+        num_queries (int): Number of sampled queries
+        seed (int): Sampling seed
+
+    Returns:
+        Dict[str, Any]: Flat latency and one {param, value, recall, ms_per_query} row per setting
+    """
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.choice(len(vectors), size=min(num_queries, len(vectors)), replace=False)]
+    k = min(k, len(vectors))
+
+    flat = faiss.IndexFlatIP(vectors.shape[1])
+    flat.add(vectors)
+    start = time.perf_counter()
+    _, truth = flat.search(queries, k)
+    flat_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    if faiss.try_extract_index_ivf(index) is not None:
+        param = "nprobe"
+    elif hasattr(index, "hnsw"):
+        param = "ef_search"
+    else:
+        param = None
+
+    rows: List[Dict[str, Any]] = []
+    for value in (SWEEP_VALUES[param] if param else [None]):
+        if param:
+            set_search_params(index, {param: value})
+        start = time.perf_counter()
+        _, found = index.search(queries, k)
+        elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+        rows.append({"param": param, "value": value, "recall": round(float(recall), 4),
+                     "ms_per_query": round(elapsed_ms, 4)})
+    set_search_params(index, config)
+
+    return {"k": k, "queries": len(queries), "flat_ms_per_query": round(flat_ms, 4), "results": rows}
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a recall_latency_report as a small table."""
+    lines = [f"Recall@{report['k']} vs flat ({report['flat_ms_per_query']:.3f} ms/query):"]
+    for row in report["results"]:
+        setting = f"{row['param']}={row['value']}" if row["param"] else "exact"
+        lines.append(f"   - {setting}: recall {row['recall']:.3f}, {row['ms_per_query']:.3f} ms/query")
+    return "\n".join(lines)
+
+
+def _pq_subquantizers(d: int, requested: int) -> int:
+    """Largest sub-quantizer count <= requested that divides the dimension."""
+    for m in range(min(requested, d), 0, -1):
+        if d % m == 0:
+            return m
+    return 1
+
+
+def _training_sample(vectors: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    """Sample enough vectors to train the coarse and product quantizers."""
+    size = min(len(vectors), max(nlist * 64, 256 * 64))
+    if size == len(vectors):
+        return vectors
+    rng = np.random.default_rng(seed)
+    return vectors[rng.choice(len(vectors), size=size, replace=False)]
@@ -0,0 +1,100 @@
+from typing import Any, Dict, Iterable, Iterator, Mapping, Tuple, Union
+from langchain.docstore.base import Docstore
+from langchain.docstore.document import Document
+import json
+import mmap
+import os
+import numpy as np
+
+
+DATA_FILE = "docstore.bin"
+OFFSETS_FILE = "docstore_offsets.npy"
+
+
+def write_docstore(directory: str, records: Iterable[Tuple[str, Document]]) -> int:
+    """Write chunks to a memory-mappable sidecar, in FAISS row order.
+
+    Each record is a UTF-8 JSON object holding the docstore id, text and
+    metadata; a uint64 offsets array marks where each record starts. Files
+    are written to temporaries and renamed, so readers never see a partial store.
+
+    Args:
+        directory (str): Vector store directory
+        records (Iterable[Tuple[str, Document]]): (docstore id, document) per FAISS row
+
+    Returns:
+        int: Number of records written
+    """
+    data_path = os.path.join(directory, DATA_FILE)
+    offsets_path = os.path.join(directory, OFFSETS_FILE)
+    offsets = [0]
+    with open(data_path + ".tmp", "wb") as f:
+        for docstore_id, doc in records:
+            record = json.dumps(
+                {"id": docstore_id, "text": doc.page_content, "metadata": doc.metadata},
+                ensure_ascii=False, separators=(",", ":"),
+            ).encode("utf-8")
+            f.write(record)
+            offsets.append(offsets[-1] + len(record))
+    with open(offsets_path + ".tmp", "wb") as f:
+        np.save(f, np.array(offsets, dtype=np.uint64))
+    os.replace(data_path + ".tmp", data_path)
+    os.replace(offsets_path + ".tmp", offsets_path)
+    return len(offsets) - 1
+
+
+def has_docstore(directory: str) -> bool:
+    """Check whether a directory contains a memory-mappable docstore."""
+    return (os.path.exists(os.path.join(directory, DATA_FILE))
+            and os.path.exists(os.path.join(directory, OFFSETS_FILE)))
+
+
+class MmapDocstore(Docstore):
+    def __init__(self, directory: str):
+        """Read-only docstore backed by a memory-mapped sidecar.
+
+        Documents are addressed by FAISS row, given as a string (see
+        `RowIds`), and decoded only when looked up, so every process
+        mapping the same files shares one page-cache copy.
+
+        Args:
+            directory (str): Vector store directory written by `write_docstore`
+        """
+        self.offsets = np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode="r")
+        with open(os.path.join(directory, DATA_FILE), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """Decode the record stored at a FAISS row."""
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self.data[start:end].decode("utf-8"))
+
+    def search(self, search: str) -> Union[str, Document]:
+        """Look up a document by FAISS row."""
+        try:
+            record = self.record(int(search))
+        except (ValueError, IndexError):
+            return f"ID {search} not found."
+        return Document(page_content=record["text"], metadata=record["metadata"])
+
+
+class RowIds(Mapping):
+    """index_to_docstore_id for `MmapDocstore`: row i maps to id "i" without storing anything."""
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def __getitem__(self, row: int) -> str:
+        if not 0 <= row < self.size:
+            raise KeyError(row)
+        return str(row)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self.size))
+
+    def __len__(self) -> int:
+        return self.size
@@ -0,0 +1,100 @@
+from typing import List, Optional
+from pathlib import Path
+from langchain.schema import Document
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+import pypdf
+
+# Cached text is only reused if it was extracted by the same pypdf version
+PARSER_VERSION = f"pypdf-{pypdf.__version__}"
+
+
+class ParseCache:
+    def __init__(self, path: str = ".cache/parsed_text.sqlite3"):
+        """Persistent cache of extracted PDF pages, keyed by file content.
+
+        Files are recognised by path, size and mtime without being read; if
+        those changed, the SHA-256 of the content is checked, so a touched but
+        unchanged file (or a renamed one) still hits. Pages are stored as
+        zlib-compressed JSON per file.
+
+        Args:
+            path (str): SQLite file holding the cache
+        """
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+            "mtime_ns INTEGER NOT NULL, sha256 TEXT NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages (sha256 TEXT NOT NULL, parser TEXT NOT NULL, data BLOB NOT NULL, "
+            "PRIMARY KEY (sha256, parser))"
+        )
+        self.conn.commit()
+
+    def get(self, pdf_file: Path) -> Optional[List[Document]]:
+        """Return the cached pages of a file, or None if it hasn't been extracted in this version."""
+        digest = self._digest(pdf_file)
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM pages WHERE sha256 = ? AND parser = ?",
+                                    (digest, PARSER_VERSION)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        source = str(pdf_file)
+        return [
+            Document(page_content=text, metadata={**metadata, "source": source})
+            for text, metadata in json.loads(zlib.decompress(row[0]))
+        ]
+
+    def put(self, pdf_file: Path, docs: List[Document]) -> None:
+        """Store a file's extracted pages, dropping pages of content no file refers to anymore."""
+        digest = self._digest(pdf_file)
+        records = [
+            (doc.page_content, {key: value for key, value in doc.metadata.items() if key != "source"})
+            for doc in docs
+        ]
+        data = zlib.compress(json.dumps(records, ensure_ascii=False).encode("utf-8"))
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO pages (sha256, parser, data) VALUES (?, ?, ?)",
+                              (digest, PARSER_VERSION, data))
+            self.conn.execute("DELETE FROM pages WHERE sha256 NOT IN (SELECT sha256 FROM files) "
+                              "OR parser != ?", (PARSER_VERSION,))
+            self.conn.commit()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the number of cached files."""
+        with self.lock:
+            files = self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "files": files}
+
+    def _digest(self, pdf_file: Path) -> str:
+        """Content hash of a file, reusing the stored one while path, size and mtime are unchanged."""
+        stat = pdf_file.stat()
+        path = str(pdf_file.resolve())
+        with self.lock:
+            row = self.conn.execute("SELECT size, mtime_ns, sha256 FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        sha = hashlib.sha256()
+        with open(pdf_file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        digest = sha.hexdigest()
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                              (path, stat.st_size, stat.st_mtime_ns, digest))
+            self.conn.commit()
+        return digest
@@ -0,0 +1,42 @@
+from src.utils.document_loader import DocumentLoader
+from src.utils.vector_store import VectorStore
+from src.utils.qa_system import QASystem
+import os
+
+# Cosine similarity at which a paraphrased question reuses a cached answer. Kept above
+# 0.95, which "create a bucket" and "delete a bucket" can reach with ada-002
+DEFAULT_SEMANTIC_CACHE_THRESHOLD = 0.97
+
+
+def build_qa_system(openai_api_key: str, data_dir: str = "data", directory: str = "vector_store") -> QASystem:
+    """Load or (re)build the vector store for a PDF directory and wrap it in a QASystem.
+
+    The saved index is memory-mapped when it still matches the PDFs on disk;
+    otherwise chunks are streamed into the index and only new or changed
+    ones are embedded. The semantic answer cache is on at
+    DEFAULT_SEMANTIC_CACHE_THRESHOLD; set SEMANTIC_CACHE_THRESHOLD to another
+    similarity, or to "off" to disable it.
+
+    Args:
+        openai_api_key (str): OpenAI API key
+        data_dir (str): Directory containing the PDFs
+        directory (str): Directory holding the saved vector store
+
+    Returns:
+        QASystem: Ready-to-use QA system
+    """
+    loader = DocumentLoader(max_workers=os.cpu_count() or 1)
+    vector_store = VectorStore(openai_api_key)
+
+    # Reuse the saved index unless the PDFs have changed since it was built
+    fingerprint = loader.corpus_fingerprint(data_dir)
+    if vector_store.is_current(fingerprint, directory):
+        vector_store.load_vector_store(directory, mmap=True)
+    else:
+        # Stream chunks into the index; only new or changed ones are embedded
+        vector_store.update_vector_store(loader.iter_chunks(data_dir), directory, corpus_fingerprint=fingerprint)
+
+    threshold = os.getenv("SEMANTIC_CACHE_THRESHOLD", str(DEFAULT_SEMANTIC_CACHE_THRESHOLD)).strip()
+    semantic_cache_threshold = None if threshold.lower() in ("", "off", "none") else float(threshold)
+
+    return QASystem(openai_api_key, vector_store, semantic_cache_threshold=semantic_cache_threshold)
@@ -1,46 +1,259 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Iterator, AsyncIterator, Tuple
 from langchain.chat_models import ChatOpenAI
-from langchain.chains import RetrievalQA
+from langchain.chat_models.base import BaseChatModel
+from langchain.prompts import ChatPromptTemplate
 from langchain.schema import Document
+import os
+from src.utils.categories import search_category
+from src.utils.context_builder import ContextBuilder
+from src.utils.tracing import tracer
+from src.utils.answer_cache import AnswerCache, SemanticAnswerCache, normalize_question
+
+# The "stuff" prompt: packed context in the system message, the question as the user message
+QA_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "Use the following pieces of context to answer the user's question. \n"
+               "If you don't know the answer, just say that you don't know, don't try to make up an answer.\n"
+               "----------------\n{context}"),
+    ("human", "{question}"),
+])
+
 
 class QASystem:
-    def __init__(self, openai_api_key: str, vector_store):
-        """Initialize the QA system with OpenAI and vector store."""
-        self.llm = ChatOpenAI(
+    def __init__(self, openai_api_key: str, vector_store, cache_size: int = 1000, cache_ttl: float = 3600,
+                 semantic_cache_threshold: Optional[float] = None, base_url: Optional[str] = None,
+                 hybrid: bool = True, candidates: int = 12, context_tokens: int = 2000,
+                 llm: Optional[BaseChatModel] = None):
+        """Initialize the QA system with OpenAI and vector store.
+        
+        Args:
+            openai_api_key (str): OpenAI API key for the chat model
+            vector_store: Loaded VectorStore to retrieve from
+            cache_size (int): Answers kept in the exact-match answer cache
+            cache_ttl (float): Seconds a cached answer stays valid
+            semantic_cache_threshold (Optional[float]): Cosine similarity above which a
+                paraphrased question reuses a cached answer; None (the default) disables the
+                semantic cache. Embedding scores cluster high, so "create a bucket" and "delete
+                a bucket" can clear 0.95; `build_qa_system` enables it at 0.97
+            base_url (Optional[str]): Alternative chat-completions endpoint, e.g. a local fake server
+            hybrid (bool): Fuse BM25 keyword hits with vector hits instead of vector search alone
+            candidates (int): Chunks retrieved per question before context packing
+            context_tokens (int): Token budget for the retrieved context in the prompt
+            llm (Optional[BaseChatModel]): Chat model to use instead of OpenAI, e.g. the
+                offline fake in `src.utils.benchmark`
+        """
+        self.llm = llm or ChatOpenAI(
             model_name="gpt-3.5-turbo",
             openai_api_key=openai_api_key,
-            temperature=0
+            openai_api_base=base_url,
+            temperature=0,
+            streaming=True
         )
         self.vector_store = vector_store
-        self.qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",
-            retriever=self.vector_store.vector_store.as_retriever(
-                search_kwargs={"k": 4}
+        self.search_kwargs = {"k": candidates, "score_threshold": None}
+        self.hybrid = hybrid
+        self.context_builder = ContextBuilder(max_tokens=context_tokens, model=self.llm.model_name)
+        self.answer_cache = AnswerCache(max_entries=cache_size, ttl_seconds=cache_ttl)
+        self.semantic_cache = None
+        if semantic_cache_threshold is not None:
+            self.semantic_cache = SemanticAnswerCache(
+                self.vector_store.embeddings,
+                similarity_threshold=semantic_cache_threshold,
+                max_entries=cache_size,
+                ttl_seconds=cache_ttl
             )
-        )
 
-    def answer_question(self, question: str) -> Dict:
-        """Answer a question using the QA chain."""
+    def answer_question(self, question: str, category: Optional[str] = None) -> Dict:
+        """Answer a question using the QA chain, serving repeated questions from the cache.
+        
+        Args:
+            question (str): The user's question
+            category (Optional[str]): Restrict retrieval to chunks of this category
+        """
         try:
-            result = self.qa_chain({"query": question})
+            for event in self.stream_answer(question, category):
+                if event["type"] == "done":
+                    return {
+                        "answer": event["answer"],
+                        "sources": event["sources"]
+                    }
+        except Exception as e:
             return {
-                "answer": result["result"],
-                "sources": self._get_sources(result)
+                "answer": f"Error: {str(e)}",
+                "sources": []
             }
+
+    def stream_answer(self, question: str, category: Optional[str] = None) -> Iterator[Dict]:
+        """Answer a question, yielding tokens as the LLM produces them.
+        
+        Yields `{"type": "token", "content": str}` events followed by one
+        `{"type": "done", "answer": str, "sources": List[Dict]}` event. Cached
+        answers arrive as a single token. Errors are raised to the caller.
+        Each call is one trace; its stages share a trace id.
+        """
+        with tracer.trace("ask"):
+            yield from self._stream_answer(question, category)
+
+    def _stream_answer(self, question: str, category: Optional[str] = None) -> Iterator[Dict]:
+        """Body of `stream_answer`."""
+        category = search_category(category)
+        cache_key = self._cache_key(question, category)
+        cached = self.answer_cache.get(cache_key)
+        
+        # Near-duplicate questions reuse an earlier answer and skip the LLM call
+        question_vector = None
+        if cached is None and self.semantic_cache:
+            question_vector = self.semantic_cache.embed(question)
+            cached = self._semantic_lookup(cache_key, question_vector)
+        if cached is not None:
+            yield {"type": "token", "content": cached["answer"]}
+            yield {"type": "done", **cached}
+            return
+        
+        # Retrieve once; the same documents and scores feed the prompt and the sources
+        docs_and_scores = self._retrieve(question, category)
+        messages, docs_and_scores = self._prepare_prompt(question, docs_and_scores)
+        tokens = []
+        # Includes time the caller spends between tokens, as the user experiences it
+        with tracer.span("llm", model=self.llm.model_name) as span:
+            for chunk in self.llm.stream(messages):
+                if chunk.content:
+                    tokens.append(chunk.content)
+                    yield {"type": "token", "content": chunk.content}
+            span["completion_tokens"] = self.context_builder.count_tokens("".join(tokens))
+        
+        yield {"type": "done", **self._store_answer(cache_key, question_vector, "".join(tokens), docs_and_scores)}
+
+    async def aanswer_question(self, question: str, category: Optional[str] = None) -> Dict:
+        """Async version of `answer_question`."""
+        try:
+            async for event in self.astream_answer(question, category):
+                if event["type"] == "done":
+                    return {
+                        "answer": event["answer"],
+                        "sources": event["sources"]
+                    }
         except Exception as e:
             return {
                 "answer": f"Error: {str(e)}",
                 "sources": []
             }
 
+    async def astream_answer(self, question: str, category: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Async version of `stream_answer` using non-blocking embedding and chat clients."""
+        with tracer.trace("ask"):
+            async for event in self._astream_answer(question, category):
+                yield event
+
+    async def _astream_answer(self, question: str, category: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Body of `astream_answer`."""
+        category = search_category(category)
+        cache_key = self._cache_key(question, category)
+        cached = self.answer_cache.get(cache_key)
+        
+        question_vector = None
+        if cached is None and self.semantic_cache:
+            question_vector = await self.semantic_cache.aembed(question)
+            cached = self._semantic_lookup(cache_key, question_vector)
+        if cached is not None:
+            yield {"type": "token", "content": cached["answer"]}
+            yield {"type": "done", **cached}
+            return
+        
+        docs_and_scores = await self._aretrieve(question, category)
+        messages, docs_and_scores = self._prepare_prompt(question, docs_and_scores)
+        tokens = []
+        with tracer.span("llm", model=self.llm.model_name) as span:
+            async for chunk in self.llm.astream(messages):
+                if chunk.content:
+                    tokens.append(chunk.content)
+                    yield {"type": "token", "content": chunk.content}
+            span["completion_tokens"] = self.context_builder.count_tokens("".join(tokens))
+        
+        yield {"type": "done", **self._store_answer(cache_key, question_vector, "".join(tokens), docs_and_scores)}
+
+    def _retrieve(self, question: str, category: Optional[str] = None) -> List[Tuple[Document, float]]:
+        """Retrieve documents and scores with hybrid or vector-only search."""
+        if self.hybrid:
+            return self.vector_store.hybrid_search(question, category=category, **self.search_kwargs)
+        return self.vector_store.similarity_search(question, category=category, **self.search_kwargs)
+
+    async def _aretrieve(self, question: str, category: Optional[str] = None) -> List[Tuple[Document, float]]:
+        """Async version of `_retrieve`."""
+        if self.hybrid:
+            return await self.vector_store.ahybrid_search(question, category=category, **self.search_kwargs)
+        return await self.vector_store.asimilarity_search(question, category=category, **self.search_kwargs)
+
+    def _semantic_lookup(self, cache_key: tuple, question_vector) -> Optional[Dict]:
+        """Look up a near-duplicate question, promoting a hit into the exact-match cache."""
+        cached = self.semantic_cache.get(question_vector, cache_key[2:], partition=cache_key[1])
+        if cached is not None:
+            self.answer_cache.put(cache_key, cached)
+        return cached
+
+    def _prepare_prompt(self, question: str,
+                        docs_and_scores: List[Tuple[Document, float]]) -> Tuple[List, List[Tuple[Document, float]]]:
+        """Pack retrieved chunks into the context budget and build the prompt messages.
+        
+        Returns:
+            Tuple[List, List[Tuple[Document, float]]]: Prompt messages and the packed passages
+        """
+        with tracer.span("prompt_build") as span:
+            context, packed, span["context_tokens"] = self.context_builder.build(docs_and_scores)
+            messages = self._build_messages(question, context)
+            span["prompt_tokens"] = sum(self.context_builder.count_tokens(message.content) for message in messages)
+        return messages, packed
+
+    def _build_messages(self, question: str, context: str) -> List:
+        """Format the "stuff" prompt with the packed context."""
+        return QA_PROMPT.format_messages(context=context, question=question)
+
+    def _store_answer(self, cache_key: tuple, question_vector, text: str,
+                      docs_and_scores: List[Tuple[Document, float]]) -> Dict:
+        """Build the answer payload and store it in the answer caches."""
+        answer = {
+            "answer": text,
+            "sources": self._get_sources({"source_documents": docs_and_scores})
+        }
+        self.answer_cache.put(cache_key, answer)
+        if self.semantic_cache:
+            self.semantic_cache.put(question_vector, cache_key[2:], answer, partition=cache_key[1])
+        return answer
+
     def _get_sources(self, result: Dict) -> List[Dict]:
-        """Extract source documents from the QA result."""
+        """Extract source documents, and their scores if retrieved with them, from the QA result."""
         sources = []
         if "source_documents" in result:
-            for doc in result["source_documents"]:
+            for item in result["source_documents"]:
+                doc, score = item if isinstance(item, tuple) else (item, None)
                 sources.append({
                     "content": doc.page_content,
-                    "metadata": doc.metadata
+                    "metadata": doc.metadata,
+                    "score": score,
+                    "source": os.path.basename(str(doc.metadata.get("source", "Unknown"))),
+                    # PDF loaders number pages from 0
+                    "page": doc.metadata["page"] + 1 if isinstance(doc.metadata.get("page"), int) else None
                 })
-        return sources 
\ No newline at end of file
+        return sources
+
+    def cache_stats(self) -> Dict:
+        """Return hit/miss counters of the exact and semantic answer caches."""
+        return {
+            "exact": self.answer_cache.stats(),
+            "semantic": self.semantic_cache.stats() if self.semantic_cache else None
+        }
+
+    def _cache_key(self, question: str, category: Optional[str] = None) -> tuple:
+        """Key answers by question, category, retriever and context settings, model and index version.
+
+        Everything after the category is the semantic cache's scope; the
+        category only partitions it, so switching categories keeps entries.
+        """
+        return (
+            normalize_question(question),
+            category,
+            tuple(sorted(self.search_kwargs.items())) + (
+                ("hybrid", self.hybrid), ("context_tokens", self.context_builder.max_tokens)
+            ),
+            self.llm.model_name,
+            self.vector_store.index_version,
+        )
@@ -0,0 +1,60 @@
+from typing import Any, Dict
+from pathlib import Path
+import json
+import os
+import threading
+import time
+
+
+class Quarantine:
+    def __init__(self, path: str = ".cache/quarantine.json"):
+        """Persistent list of PDFs that hung or crashed the parser.
+
+        A file stays quarantined only while its size and mtime are unchanged,
+        so replacing it with a fixed copy lets it be ingested again.
+
+        Args:
+            path (str): JSON file holding the list
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def contains(self, pdf_file: Path) -> bool:
+        """Check whether this version of a file is quarantined."""
+        entry = self.entries.get(str(pdf_file.resolve()))
+        if entry is None:
+            return False
+        stat = pdf_file.stat()
+        return entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+
+    def add(self, pdf_file: Path, reason: str) -> None:
+        """Quarantine the current version of a file."""
+        stat = pdf_file.stat()
+        with self.lock:
+            self.entries[str(pdf_file.resolve())] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "reason": reason,
+                "quarantined_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            self._save()
+
+    def remove(self, pdf_file: Path) -> None:
+        """Release a file so the next ingest tries it again."""
+        with self.lock:
+            if self.entries.pop(str(pdf_file.resolve()), None) is not None:
+                self._save()
+
+    def _save(self) -> None:
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(self.path + ".tmp", self.path)
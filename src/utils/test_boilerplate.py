@@ -0,0 +1,58 @@
+from langchain.schema import Document
+from src.utils.boilerplate import strip_boilerplate
+
+HEADER = "Amazon Simple Storage Service User Guide"
+POLICY = """{
+  "Version": "2012-10-17",
+  "Statement": []
+}"""
+
+
+def guide_pages():
+    """Six pages laid out like an AWS guide: running header, API-version footer, page number."""
+    bodies = [
+        "Creating a bucket\nTo upload your data to Amazon S3, you must first create a bucket.",
+        "Bucket policies\nAn empty policy looks like this:\n" + POLICY,
+        "Access points\nEvery access point starts from an empty policy:\n" + POLICY,
+        "Object Lock\nObject Lock prevents objects from being deleted or overwritten.\n" + POLICY,
+        "Versioning\nVersioning keeps multiple variants of an object in the same bucket.",
+        "Document history for the Amazon S3 User Guide\nChange | Description | Date\n"
+        "Object Lock | Added retention modes. | March 1, 2024",
+    ]
+    return [
+        Document(page_content=f"{HEADER}\n{body}\nAPI Version 2006-03-01 {page + 1}\n{page + 1}",
+                 metadata={"source": "s3-guide.pdf", "page": page})
+        for page, body in enumerate(bodies)
+    ]
+
+
+def test_strip_boilerplate():
+    """Headers, footers, page numbers and the change log go; repeated JSON and the content stay."""
+    pages = guide_pages()
+
+    removed = strip_boilerplate(pages)
+
+    assert removed[HEADER] == 6
+    assert removed["API Version 2006-03-01 1"] == 6
+    assert removed["1"] == 6
+    assert removed["Document history"] == 1
+    assert HEADER not in pages[0].page_content
+    assert "API Version" not in pages[4].page_content
+    assert pages[0].page_content.startswith("Creating a bucket\nTo upload your data")
+    for page in pages[1:4]:
+        assert page.page_content.endswith(POLICY)
+    assert pages[5].page_content == ""
+
+
+def test_short_files_are_left_alone():
+    """Two pages are too few to tell boilerplate from content."""
+    pages = guide_pages()[:2]
+    original = [page.page_content for page in pages]
+
+    assert strip_boilerplate(pages) == {}
+    assert [page.page_content for page in pages] == original
+
+
+if __name__ == "__main__":
+    test_strip_boilerplate()
+    test_short_files_are_left_alone()
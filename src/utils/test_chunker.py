@@ -0,0 +1,53 @@
+from langchain.schema import Document
+from src.utils.chunker import StructuredChunker
+
+VERSIONING = """Bucket versioning
+Status
+Valid values
+Enabled
+Disabled
+Suspended
+Once you enable versioning on a bucket, it can never return to an unversioned state.
+You can only suspend versioning on that bucket."""
+
+APPENDIX = """Related resources
+AWS CLI Command Reference"""
+
+
+def test_heading_only_text_is_kept():
+    """Runs of heading-like lines stay with the text under them, and a trailing heading is still emitted."""
+    pages = [
+        Document(page_content=VERSIONING, metadata={"source": "s3-guide.pdf", "page": 0}),
+        Document(page_content=APPENDIX, metadata={"source": "s3-guide.pdf", "page": 1}),
+    ]
+
+    chunks = StructuredChunker(max_tokens=400, min_tokens=0).split_documents(pages)
+
+    text = "\n".join(chunk.page_content for chunk in chunks)
+    for line in (VERSIONING + "\n" + APPENDIX).splitlines():
+        assert line in text
+    first = chunks[0]
+    assert first.page_content.startswith("Bucket versioning\nStatus\nValid values\nEnabled\nDisabled\nSuspended\n")
+    assert "can never return" in first.page_content
+    assert first.metadata["page"] == 0
+    last = chunks[-1]
+    assert last.page_content == "Related resources\nAWS CLI Command Reference"
+    assert last.metadata["page"] == 1
+
+
+def test_long_heading_runs_are_split_not_dropped():
+    """A table of contents longer than the budget spreads over several chunks."""
+    toc = "\n".join(f"Chapter {i} Overview" for i in range(1, 41))
+    pages = [Document(page_content=toc, metadata={"source": "guide.pdf", "page": 0})]
+
+    chunker = StructuredChunker(max_tokens=20, min_tokens=0)
+    chunks = chunker.split_documents(pages)
+
+    assert len(chunks) > 1
+    assert all(chunker.count_tokens(chunk.page_content) <= 20 for chunk in chunks)
+    assert "\n".join(chunk.page_content for chunk in chunks) == toc
+
+
+if __name__ == "__main__":
+    test_heading_only_text_is_kept()
+    test_long_heading_runs_are_split_not_dropped()
@@ -0,0 +1,99 @@
+import base64
+import json
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langchain.docstore.document import Document
+from src.utils.embedding_scheduler import RateLimiter
+from src.utils.vector_store import VectorStore
+
+
+class FakeEmbeddingsHandler(BaseHTTPRequestHandler):
+    """OpenAI-style /v1/embeddings endpoint that rate-limits every third request."""
+    lock = threading.Lock()
+    requests = 0
+    in_flight = 0
+    max_in_flight = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        cls = type(self)
+        with cls.lock:
+            cls.requests += 1
+            throttle = cls.requests % 3 == 0
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        time.sleep(0.05)
+        with cls.lock:
+            cls.in_flight -= 1
+        if throttle:
+            self._send(429, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                       {"retry-after": "0"})
+            return
+        # Inputs arrive as strings or, after client-side tokenization, as token id lists
+        data = []
+        for i, item in enumerate(body["input"]):
+            vector = [float(len(item)), 1.0]
+            if body.get("encoding_format") == "base64":
+                vector = base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode()
+            data.append({"object": "embedding", "index": i, "embedding": vector})
+        self._send(200, {"object": "list", "data": data, "model": body.get("model"),
+                         "usage": {"prompt_tokens": 0, "total_tokens": 0}})
+
+    def _send(self, status, payload, headers=None):
+        encoded = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_embedding_scheduler():
+    """Indexing through OpenAIEmbeddings runs batches concurrently, in order, and retries 429s itself."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeEmbeddingsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    directory = tempfile.mkdtemp()
+    try:
+        vector_store = VectorStore("test-key", base_url=f"http://127.0.0.1:{server.server_port}/v1",
+                                   max_in_flight=4, embedding_cache=None)
+        vector_store.scheduler.initial_backoff = 0.01
+        docs = [Document(page_content=f"chunk {i} " + "text " * i, metadata={"source": f"doc{i}.pdf", "page": 0})
+                for i in range(12)]
+
+        vector_store.create_vector_store(docs, directory, batch_size=2)
+
+        stats = vector_store.scheduler.stats
+        assert vector_store.vector_store.index.ntotal == 12
+        assert [vector_store._document_at(i).page_content for i in range(12)] == [doc.page_content for doc in docs]
+        assert stats["texts"] == 12
+        assert stats["retries"] > 0
+        # openai.RateLimitError reached the scheduler directly: the client made no retries of its own
+        assert FakeEmbeddingsHandler.requests == stats["requests"] + stats["retries"]
+        assert FakeEmbeddingsHandler.max_in_flight > 1
+        print(vector_store.scheduler.report())
+    finally:
+        server.shutdown()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_rate_limiter():
+    """Requests beyond the bucket capacity wait for it to refill."""
+    limiter = RateLimiter(per_minute=600)  # 10 per second
+    limiter.acquire(600)
+    start = time.monotonic()
+    limiter.acquire(2)
+    assert time.monotonic() - start >= 0.15
+
+
+if __name__ == "__main__":
+    test_embedding_scheduler()
+    test_rate_limiter()
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langchain.docstore.document import Document
+from src.utils.benchmark import HashEmbeddings
+from src.utils.qa_system import QASystem
+from src.utils.vector_store import VectorStore
+
+ANSWER_TOKENS = ["Create ", "a ", "bucket ", "in ", "the ", "S3 ", "console."]
+
+
+class FakeChatHandler(BaseHTTPRequestHandler):
+    """OpenAI-style streaming /v1/chat/completions endpoint sending one SSE chunk per token."""
+    lock = threading.Lock()
+    requests = 0
+    last_token_sent = 0.0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        assert body.get("stream")
+        with type(self).lock:
+            type(self).requests += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for token in ANSWER_TOKENS:
+            self._event({"role": "assistant", "content": token}, None)
+            type(self).last_token_sent = time.monotonic()
+            time.sleep(0.05)
+        self._event({}, "stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _event(self, delta, finish_reason):
+        chunk = {
+            "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": 0, "model": "gpt-3.5-turbo",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def build_qa_system(base_url: str, directory: str) -> QASystem:
+    """QASystem over a small offline index, with the chat model pointed at the fake server."""
+    docs = [
+        Document(page_content="To create a bucket, open the Amazon S3 console and choose Create bucket.",
+                 metadata={"source": "s3-guide.pdf", "page": 3, "category": "Storage", "categories": ["Storage"]}),
+        Document(page_content="Amazon EC2 instances are launched from an AMI in a subnet of your VPC.",
+                 metadata={"source": "ec2-guide.pdf", "page": 7, "category": "Compute", "categories": ["Compute"]}),
+    ]
+    vector_store = VectorStore("offline", embedding_cache=None, embeddings=HashEmbeddings())
+    vector_store.create_vector_store(docs, directory)
+    return QASystem("test-key", vector_store, base_url=base_url)
+
+
+def check_events(events, received_at):
+    """Tokens arrive before the server finished sending, then a done event with sources."""
+    tokens = [event["content"] for event in events if event["type"] == "token"]
+    assert tokens == ANSWER_TOKENS
+    assert received_at[0] < FakeChatHandler.last_token_sent
+    done = events[-1]
+    assert done["type"] == "done"
+    assert done["answer"] == "".join(ANSWER_TOKENS)
+    assert done["sources"] and done["sources"][0]["source"] == "s3-guide.pdf"
+
+
+def test_stream_answer():
+    """stream_answer and astream_answer stream tokens incrementally; cache hits arrive as one token."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    directory = tempfile.mkdtemp()
+    try:
+        qa_system = build_qa_system(f"http://127.0.0.1:{server.server_port}/v1", directory)
+
+        events, received_at = [], []
+        for event in qa_system.stream_answer("How do I create an S3 bucket?"):
+            events.append(event)
+            received_at.append(time.monotonic())
+        check_events(events, received_at)
+
+        async def collect():
+            events, received_at = [], []
+            async for event in qa_system.astream_answer("Where do I create a bucket in S3?"):
+                events.append(event)
+                received_at.append(time.monotonic())
+            return events, received_at
+
+        check_events(*asyncio.run(collect()))
+        assert FakeChatHandler.requests == 2
+
+        cached = list(qa_system.stream_answer("how do I create an S3 bucket"))
+        assert [event["type"] for event in cached] == ["token", "done"]
+        assert cached[0]["content"] == "".join(ANSWER_TOKENS)
+        assert cached[1]["sources"] == events[-1]["sources"]
+        assert FakeChatHandler.requests == 2
+    finally:
+        server.shutdown()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_stream_answer()
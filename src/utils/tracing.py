@@ -0,0 +1,215 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+# Per-stage timing for the pipeline. Spans are no-ops until a sink is
+# configured, e.g. TRACE_SINKS="logging,jsonl:traces.jsonl,prometheus".
+
+_trace_id: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+
+# Histogram buckets in seconds, from sub-millisecond searches to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Span attributes summed into counters by PrometheusSink
+COUNTED_ATTRIBUTES = ("pages", "chunks", "texts", "tokens", "prompt_tokens", "completion_tokens", "results", "retries")
+
+
+class LoggingSink:
+    def __init__(self, logger: str = "rag.trace", level: int = logging.INFO):
+        """Log one line per span."""
+        self.logger = logging.getLogger(logger)
+        self.level = level
+
+    def emit(self, record: Dict[str, Any]) -> None:
+        attributes = {key: value for key, value in record.items() if key not in ("stage", "seconds", "timestamp")}
+        self.logger.log(self.level, "%s %.1fms %s", record["stage"], record["seconds"] * 1000,
+                        json.dumps(attributes, default=str))
+
+
+class JsonlSink:
+    def __init__(self, path: str = "traces.jsonl"):
+        """Append one JSON object per span to a file."""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file = open(path, "a", encoding="utf-8")
+        self.lock = threading.Lock()
+
+    def emit(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, default=str)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+
+
+class PrometheusSink:
+    def __init__(self, namespace: str = "rag", buckets: tuple = DEFAULT_BUCKETS):
+        """Aggregate spans into per-stage duration histograms and counters.
+
+        Span attributes listed in COUNTED_ATTRIBUTES are summed into
+        `<namespace>_stage_<attribute>_total` counters; `render` returns the
+        Prometheus text exposition format.
+        """
+        self.namespace = namespace
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.bucket_counts: Dict[str, List[int]] = defaultdict(lambda: [0] * len(self.buckets))
+        self.sums: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.totals: Dict[tuple, float] = defaultdict(float)
+
+    def emit(self, record: Dict[str, Any]) -> None:
+        stage, seconds = record["stage"], record["seconds"]
+        with self.lock:
+            counts = self.bucket_counts[stage]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[i] += 1
+            self.sums[stage] += seconds
+            self.counts[stage] += 1
+            if "error" in record:
+                self.errors[stage] += 1
+            for key in COUNTED_ATTRIBUTES:
+                if isinstance(record.get(key), (int, float)):
+                    self.totals[(key, stage)] += record[key]
+
+    def render(self) -> str:
+        """Current metrics in the Prometheus text format."""
+        name = f"{self.namespace}_stage_duration_seconds"
+        lines = [f"# TYPE {name} histogram"]
+        with self.lock:
+            for stage in sorted(self.counts):
+                for bound, count in zip(self.buckets, self.bucket_counts[stage]):
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {self.counts[stage]}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {self.sums[stage]}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {self.counts[stage]}')
+            lines.append(f"# TYPE {self.namespace}_stage_errors_total counter")
+            for stage in sorted(self.errors):
+                lines.append(f'{self.namespace}_stage_errors_total{{stage="{stage}"}} {self.errors[stage]}')
+            for key in sorted({key for key, _ in self.totals}):
+                lines.append(f"# TYPE {self.namespace}_stage_{key}_total counter")
+                for (total_key, stage), value in sorted(self.totals.items()):
+                    if total_key == key:
+                        lines.append(f'{self.namespace}_stage_{key}_total{{stage="{stage}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+class Tracer:
+    def __init__(self, sinks: Optional[List[Any]] = None):
+        """Time pipeline stages and hand each span to the configured sinks.
+
+        Args:
+            sinks (Optional[List[Any]]): Objects with an `emit(record)` method
+        """
+        self.sinks = list(sinks or [])
+
+    @contextmanager
+    def span(self, stage: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """Time a block as one stage.
+
+        Yields the span's attribute dict so counts known only after the work
+        (tokens, results) can be added to it.
+
+        Args:
+            stage (str): Stage name, e.g. "parse" or "llm"
+            **attributes: Extra fields recorded with the span
+        """
+        if not self.sinks:
+            yield attributes
+            return
+        start = time.perf_counter()
+        try:
+            yield attributes
+        except Exception as e:
+            # GeneratorExit from a consumer that stops early is not an error
+            attributes["error"] = type(e).__name__
+            raise
+        finally:
+            record = {
+                "stage": stage,
+                "seconds": time.perf_counter() - start,
+                "timestamp": time.time(),
+                "trace_id": _trace_id.get(),
+                **attributes,
+            }
+            for sink in self.sinks:
+                try:
+                    sink.emit(record)
+                except Exception:
+                    logging.getLogger("rag.trace").exception("Trace sink %r failed", sink)
+
+    @contextmanager
+    def trace(self, stage: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """Start a new trace id, e.g. per question, and time the whole block as `stage`."""
+        token = _trace_id.set(uuid.uuid4().hex[:16])
+        try:
+            with self.span(stage, **attributes) as span:
+                yield span
+        finally:
+            try:
+                _trace_id.reset(token)
+            except ValueError:
+                # A generator was closed from a different context than it started in
+                pass
+
+    def traced(self, stage: str) -> Callable:
+        """Decorator timing every call of a function as `stage`."""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def prometheus(self) -> Optional[PrometheusSink]:
+        """The configured Prometheus sink, if any."""
+        return next((sink for sink in self.sinks if isinstance(sink, PrometheusSink)), None)
+
+
+tracer = Tracer()
+
+
+def configure_tracing(spec: Optional[str] = None) -> Tracer:
+    """Replace the shared tracer's sinks from a comma-separated spec.
+
+    Entries are `logging` (to stderr), `jsonl[:path]` and `prometheus`; an
+    empty spec turns tracing off.
+
+    Args:
+        spec (Optional[str]): Sink spec; defaults to the TRACE_SINKS environment variable
+
+    Returns:
+        Tracer: The shared tracer
+    """
+    spec = os.getenv("TRACE_SINKS", "") if spec is None else spec
+    sinks = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        kind, _, argument = entry.partition(":")
+        if kind == "logging":
+            sink = LoggingSink()
+            # Nothing else configures logging; without a handler the INFO lines go nowhere
+            if not sink.logger.handlers:
+                handler = logging.StreamHandler()
+                handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+                sink.logger.addHandler(handler)
+                sink.logger.propagate = False
+            sink.logger.setLevel(sink.level)
+            sinks.append(sink)
+        elif kind == "jsonl":
+            sinks.append(JsonlSink(argument or "traces.jsonl"))
+        elif kind == "prometheus":
+            sinks.append(PrometheusSink())
+        else:
+            raise ValueError(f"Unknown trace sink: {kind}")
+    tracer.sinks = sinks
+    return tracer
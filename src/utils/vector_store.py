@@ -1,83 +1,381 @@
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Iterable, Iterator, Set
 from langchain.docstore.document import Document
+from langchain.embeddings.base import Embeddings
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from src.utils.embedding_scheduler import EmbeddingScheduler
+from src.utils.embedding_cache import CachedEmbeddings
+from src.utils.bm25_index import BM25Builder, BM25Index, reciprocal_rank_fusion
+from src.utils.tracing import tracer
+from src.utils.mmap_docstore import MmapDocstore, RowIds, has_docstore, write_docstore
+from src.utils.faiss_index import (
+    DEFAULT_INDEX_CONFIG, build_index, build_params, format_report, recall_latency_report, set_search_params
+)
 import os
 import json
+import asyncio
+import hashlib
 from datetime import datetime
 import numpy as np
+import faiss
 
 class VectorStore:
-    def __init__(self, openai_api_key: str):
+    # Embeddings are L2-normalized and stored in an inner-product index, so
+    # scores are cosine similarities where higher is better
+    SIMILARITY = "cosine"
+    # Bumped when the saved layout, chunk metadata or chunking changes, forcing a rebuild
+    FORMAT_VERSION = 3
+
+    def __init__(self, openai_api_key: str, base_url: Optional[str] = None, max_in_flight: int = 4,
+                 requests_per_minute: float = 3000, tokens_per_minute: float = 1_000_000,
+                 embedding_cache: Optional[str] = ".cache/embeddings.sqlite3",
+                 index_config: Optional[Dict[str, Any]] = None, embeddings: Optional[Embeddings] = None):
         """Initialize the vector store with OpenAI embeddings.
         
         Args:
             openai_api_key (str): OpenAI API key for embeddings
+            base_url (Optional[str]): Alternative embeddings endpoint, e.g. a local fake server
+            max_in_flight (int): Embedding batches sent concurrently while indexing
+            requests_per_minute (float): Embedding request budget per minute
+            tokens_per_minute (float): Embedding token budget per minute
+            embedding_cache (Optional[str]): SQLite file caching document and query
+                embeddings; None disables the cache
+            index_config (Optional[Dict[str, Any]]): FAISS index type ("flat", "ivf_flat",
+                "ivf_pq", "hnsw") and its build/search parameters; see DEFAULT_INDEX_CONFIG
+            embeddings (Optional[Embeddings]): Embeddings model to use instead of OpenAI,
+                e.g. the offline fakes in `src.utils.benchmark`
         """
-        self.embeddings = OpenAIEmbeddings(api_key=openai_api_key)
+        self.embeddings = embeddings or OpenAIEmbeddings(api_key=openai_api_key, base_url=base_url)
+        # The scheduler retries indexing batches itself; the client's own retries would stack with them
+        indexing_embeddings = embeddings or OpenAIEmbeddings(api_key=openai_api_key, base_url=base_url, max_retries=0)
+        cache = CachedEmbeddings(self.embeddings, embedding_cache) if embedding_cache else None
+        # Indexing checks the cache before the scheduler, so cached texts don't use the rate budget
+        self.scheduler = EmbeddingScheduler(
+            indexing_embeddings,
+            cache=cache,
+            max_in_flight=max_in_flight,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+        )
+        self.embeddings = cache or self.embeddings
+        self.index_config = {**DEFAULT_INDEX_CONFIG, **(index_config or {})}
+        self.index_report = None
+        self.index_version = None
+        self.bm25 = None
+        self.category_rows: Dict[str, np.ndarray] = {}
+        # Per category: FAISS ID selector and BM25 row mask, built once rather than per query
+        self.category_filters: Dict[str, Tuple[faiss.IDSelector, np.ndarray]] = {}
         self.vector_store = None
         self.metadata_file = "vector_store_metadata.json"
+        self.manifest_file = "vector_store_manifest.json"
+        self.category_rows_file = "category_rows.npz"
 
-    def create_vector_store(self, documents: List[Document], directory: str = "vector_store", batch_size: int = 100) -> None:
+    def create_vector_store(self, documents: Iterable[Document], directory: str = "vector_store", batch_size: int = 100,
+                            corpus_fingerprint: Optional[Dict[str, Any]] = None) -> None:
         """Create and save a vector store from documents.
         
         Args:
-            documents (List[Document]): List of documents to create vector store from
+            documents (Iterable[Document]): Documents to create vector store from; may be a
+                generator such as `DocumentLoader.iter_chunks`, consumed one batch at a time
+                (the docstore and BM25 index still hold every chunk's text)
             directory (str): Directory to save vector store in
             batch_size (int): Number of documents to process at once
+            corpus_fingerprint (Optional[Dict[str, Any]]): Fingerprint of the source files,
+                stored in the metadata so `is_current` can detect corpus changes
         """
-        if not documents:
+        manifest: Dict[str, str] = {}
+        categories = set()
+        self.vector_store = None
+        
+        # Process documents in batches, deduplicated by content hash; the hash doubles as the docstore id
+        print(f"Processing documents in batches of {batch_size}...")
+        self._add_batches(self._unique_batches(documents, batch_size, manifest, categories))
+        
+        if self.vector_store is None:
             raise ValueError("No documents provided to create vector store")
         
-        # Process documents in batches
-        total_docs = len(documents)
-        print(f"Processing {total_docs} documents in batches of {batch_size}...")
+        with tracer.span("save", chunks=len(manifest)):
+            self._save(directory, manifest, categories, batch_size, corpus_fingerprint)
+
+    def update_vector_store(self, documents: Iterable[Document], directory: str = "vector_store", batch_size: int = 100,
+                            corpus_fingerprint: Optional[Dict[str, Any]] = None) -> None:
+        """Incrementally bring a saved vector store in line with documents.
+        
+        Chunks are identified by a hash of their text, source and page. Chunks
+        already in the store are kept without re-embedding, new chunks are
+        embedded and added, and chunks that no longer appear in `documents`
+        (because their source PDF changed or was removed) are deleted.
+        Falls back to `create_vector_store` if no saved store exists.
+        
+        Args:
+            documents (Iterable[Document]): Full, current set of documents; may be a generator
+            directory (str): Directory containing the vector store
+            batch_size (int): Number of new documents to embed at once
+            corpus_fingerprint (Optional[Dict[str, Any]]): Fingerprint of the source files
+        """
+        previous = self._load_manifest(directory)
+        metadata = self._load_metadata(directory) or {}
+        # Only flat indexes renumber rows on delete the way FAISS.delete assumes: HNSW can't remove
+        # vectors and IVF keeps gaps in its labels. Others are rebuilt (cheaply, via the embedding cache)
+        if (previous is None or not self._matches_config(metadata) or self.index_config["type"] != "flat"
+                or not os.path.exists(os.path.join(os.getcwd(), directory, "index.faiss"))):
+            self.create_vector_store(documents, directory, batch_size, corpus_fingerprint)
+            return
+        
+        self.vector_store = self._load_faiss(os.path.join(os.getcwd(), directory))
+        self.index_report = metadata.get("index", {}).get("report")
+        
+        manifest: Dict[str, str] = {}
+        categories = set()
+        # Embed only chunks that are not already in the store
+        new_batches = (
+            ([doc for doc, chunk_id in zip(batch, batch_ids) if chunk_id not in previous],
+             [chunk_id for chunk_id in batch_ids if chunk_id not in previous])
+            for batch, batch_ids in self._unique_batches(documents, batch_size, manifest, categories)
+        )
+        added = self._add_batches(new_batches)
+        
+        if not manifest:
+            raise ValueError("No documents provided to update vector store")
+        
+        # Remove chunks from changed or deleted sources
+        stale_ids = [chunk_id for chunk_id in previous if chunk_id not in manifest]
+        if stale_ids:
+            self.vector_store.delete(stale_ids)
+        print(f"Updated vector store: {added} new, {len(stale_ids)} removed, "
+              f"{len(manifest) - added} unchanged")
+        
+        with tracer.span("save", chunks=len(manifest)):
+            self._save(directory, manifest, categories, batch_size, corpus_fingerprint)
+
+    def _add_batches(self, batches: Iterable[Tuple[List[Document], List[str]]]) -> int:
+        """Embed batches through the scheduler and add them to the index.
+        
+        Several batches are in flight at once; results are added in input order.
+        Creates the FAISS index from the first batch if none is loaded.
         
-        for i in range(0, total_docs, batch_size):
-            batch = documents[i:i + batch_size]
-            if i == 0:
-                # Create new vector store for first batch
-                self.vector_store = FAISS.from_documents(batch, self.embeddings)
-            else:
-                # Add to existing vector store for subsequent batches
-                self.vector_store.add_documents(batch)
-            print(f"Processed {min(i + batch_size, total_docs)}/{total_docs} documents")
+        Args:
+            batches (Iterable[Tuple[List[Document], List[str]]]): Documents and their ids
+            
+        Returns:
+            int: Number of documents added
+        """
+        added = 0
+        self.scheduler.reset_stats()
+        work = (([doc.page_content for doc in docs], (docs, ids)) for docs, ids in batches if docs)
+        for texts, vectors, (docs, ids) in self.scheduler.iter_embeddings(work):
+            text_embeddings = list(zip(texts, vectors))
+            metadatas = [doc.metadata for doc in docs]
+            with tracer.span("index_add", texts=len(docs)):
+                if self.vector_store is None:
+                    self.vector_store = FAISS.from_embeddings(
+                        text_embeddings, self.embeddings, metadatas=metadatas, ids=ids,
+                        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT, normalize_L2=True
+                    )
+                else:
+                    self.vector_store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+            added += len(docs)
+            print(f"Processed {added} documents")
+        if added:
+            print(self.scheduler.report())
+        return added
+
+    def _save(self, directory: str, manifest: Dict[str, str], categories: Set[str], batch_size: int,
+              corpus_fingerprint: Optional[Dict[str, Any]]) -> None:
+        """Save the index, its chunk manifest and metadata.
+        
+        Args:
+            directory (str): Directory to save vector store in
+            manifest (Dict[str, str]): Content-hash id to source of every chunk in the index
+            categories (Set[str]): Categories of the chunks in the index
+            batch_size (int): Batch size used while embedding
+            corpus_fingerprint (Optional[Dict[str, Any]]): Fingerprint of the source files
+        """
+        # Vectors are collected in a flat index; convert to the configured ANN index before saving
+        if self.index_config["type"] != "flat" and isinstance(self.vector_store.index, faiss.IndexFlat):
+            self._build_configured_index()
         
         # Save vector store
         save_path = os.path.join(os.getcwd(), directory)
         os.makedirs(save_path, exist_ok=True)
-        self.vector_store.save_local(save_path)
+        self._save_faiss(save_path)
+        
+        # One pass over the rows writes the mmap-able chunk sidecar and the BM25 index
+        bm25 = BM25Builder()
+        category_rows: Dict[str, List[int]] = {}
+        
+        def rows() -> Iterator[Tuple[str, Document]]:
+            for i in range(self.vector_store.index.ntotal):
+                docstore_id = self.vector_store.index_to_docstore_id[i]
+                doc = self.vector_store.docstore.search(docstore_id)
+                bm25.add(doc.page_content)
+                for category in doc.metadata.get("categories", [doc.metadata.get("category", "unknown")]):
+                    category_rows.setdefault(category, []).append(i)
+                yield docstore_id, doc
+        
+        write_docstore(save_path, rows())
+        bm25.save(save_path)
+        self.bm25 = BM25Index.load(save_path)
+        self._set_category_rows({category: np.array(rows, dtype=np.int64) for category, rows in category_rows.items()})
+        with open(os.path.join(save_path, self.category_rows_file + ".tmp"), "wb") as f:
+            np.savez(f, **self.category_rows)
+        os.replace(os.path.join(save_path, self.category_rows_file + ".tmp"),
+                   os.path.join(save_path, self.category_rows_file))
+        
+        # Save manifest of chunk ids so the next update can skip them
+        self._save_manifest(directory, manifest)
         
         # Save metadata
         metadata = {
             "created_at": datetime.now().isoformat(),
-            "document_count": len(documents),
-            "sources": list(set(doc.metadata.get("source", "unknown") for doc in documents)),
-            "categories": list(set(doc.metadata.get("category", "unknown") for doc in documents)),
-            "batch_size": batch_size
+            "document_count": len(manifest),
+            "sources": list(set(manifest.values())),
+            "categories": list(categories),
+            "batch_size": batch_size,
+            "similarity": self.SIMILARITY,
+            "format_version": self.FORMAT_VERSION,
+            "index": {
+                "config": self.index_config,
+                "built": type(self.vector_store.index).__name__,
+                "report": self.index_report
+            },
+            "corpus_fingerprint": corpus_fingerprint
         }
         self._save_metadata(directory, metadata)
+        self.index_version = metadata["created_at"]
         
         print(f"✅ Saved vector store to {directory}")
         print(f"📊 Statistics:")
         print(f"   - Documents: {metadata['document_count']}")
         print(f"   - Sources: {', '.join(metadata['sources'])}")
         print(f"   - Categories: {', '.join(metadata['categories'])}")
+        print(f"   - Index: {metadata['index']['built']}")
+
+    def _build_configured_index(self) -> None:
+        """Replace the flat index with the configured approximate index.
+        
+        Row order is preserved, so the docstore mapping stays valid. A
+        recall-vs-latency report against exact search is stored in
+        `index_report` and saved with the metadata.
+        """
+        flat_index = self.vector_store.index
+        vectors = flat_index.reconstruct_n(0, flat_index.ntotal)
+        index = build_index(vectors, self.index_config)
+        if not isinstance(index, faiss.IndexFlat):
+            self.index_report = recall_latency_report(vectors, index, self.index_config)
+            print(format_report(self.index_report))
+        self.vector_store.index = index
+
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> None:
+        """Tune approximate search on the loaded index.
+        
+        Args:
+            nprobe (Optional[int]): IVF cells visited per query
+            ef_search (Optional[int]): HNSW candidate list size per query
+        """
+        if nprobe is not None:
+            self.index_config["nprobe"] = nprobe
+        if ef_search is not None:
+            self.index_config["ef_search"] = ef_search
+        if self.vector_store:
+            set_search_params(self.vector_store.index, self.index_config)
+
+    def _matches_config(self, metadata: Dict[str, Any]) -> bool:
+        """Check that saved metadata was built with this store's similarity and index settings.
+        
+        Args:
+            metadata (Dict[str, Any]): Saved vector store metadata
+            
+        Returns:
+            bool: True if the saved index can be reused as-is
+        """
+        saved_config = metadata.get("index", {}).get("config", DEFAULT_INDEX_CONFIG)
+        return (metadata.get("similarity") == self.SIMILARITY
+                and metadata.get("format_version") == self.FORMAT_VERSION
+                and build_params(saved_config) == build_params(self.index_config))
+
+    @staticmethod
+    def chunk_id(doc: Document) -> str:
+        """Compute the content hash of a chunk from its text, source and page.
+        
+        Args:
+            doc (Document): Chunk to hash
+            
+        Returns:
+            str: Hex SHA-256 digest
+        """
+        key = "\0".join([
+            str(doc.metadata.get("source", "")),
+            str(doc.metadata.get("page", "")),
+            doc.page_content,
+        ])
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _unique_batches(self, documents: Iterable[Document], batch_size: int, manifest: Dict[str, str],
+                        categories: Set[str]) -> Iterator[Tuple[List[Document], List[str]]]:
+        """Group documents into batches, dropping duplicate chunks.
+        
+        Records every emitted chunk in `manifest` and its category in
+        `categories`, so callers never need the full document list.
+        
+        Args:
+            documents (Iterable[Document]): Documents to batch
+            batch_size (int): Maximum documents per batch
+            manifest (Dict[str, str]): Filled with content-hash id to source
+            categories (Set[str]): Filled with chunk categories
+            
+        Yields:
+            Tuple[List[Document], List[str]]: A batch of unique documents and their ids
+        """
+        batch, batch_ids = [], []
+        for doc in documents:
+            chunk_id = self.chunk_id(doc)
+            if chunk_id in manifest:
+                continue
+            manifest[chunk_id] = doc.metadata.get("source", "unknown")
+            categories.add(doc.metadata.get("category", "unknown"))
+            batch.append(doc)
+            batch_ids.append(chunk_id)
+            if len(batch) == batch_size:
+                yield batch, batch_ids
+                batch, batch_ids = [], []
+        if batch:
+            yield batch, batch_ids
 
-    def load_vector_store(self, directory: str = "vector_store") -> None:
+    @tracer.traced("load")
+    def load_vector_store(self, directory: str = "vector_store", mmap: bool = False) -> None:
         """Load an existing vector store from directory.
         
         Args:
             directory (str): Directory containing the vector store
+            mmap (bool): Memory-map the index and chunk sidecar read-only instead of
+                reading them into the heap, so worker processes on a host share one
+                page-cache copy. The loaded store can be searched but not updated.
         """
         load_path = os.path.join(os.getcwd(), directory)
         if not os.path.exists(load_path):
             raise ValueError(f"Vector store directory {directory} does not exist")
         
-        self.vector_store = FAISS.load_local(str(load_path), self.embeddings)
+        if mmap and has_docstore(load_path):
+            self.vector_store = self._mmap_faiss(str(load_path))
+        else:
+            self.vector_store = self._load_faiss(str(load_path))
+        self.bm25 = BM25Index.load(str(load_path), mmap=mmap)
+        category_rows_path = os.path.join(load_path, self.category_rows_file)
+        self._set_category_rows({})
+        if os.path.exists(category_rows_path):
+            with np.load(category_rows_path) as category_rows:
+                self._set_category_rows({category: category_rows[category] for category in category_rows.files})
         
         # Load and display metadata
         metadata = self._load_metadata(directory)
+        self.index_version = (metadata or {}).get("created_at")
+        if metadata and "index" in metadata:
+            # Restore how the index was built; search parameters stay as configured here
+            self.index_config.update(build_params(metadata["index"]["config"]))
+            self.index_report = metadata["index"].get("report")
+        set_search_params(self.vector_store.index, self.index_config)
         if metadata:
             print(f"✅ Loaded vector store from {directory}")
             print(f"📊 Statistics:")
@@ -85,29 +383,262 @@ class VectorStore:
             print(f"   - Created: {metadata.get('created_at', 'unknown')}")
             print(f"   - Sources: {', '.join(metadata.get('sources', ['unknown']))}")
             print(f"   - Categories: {', '.join(metadata.get('categories', ['unknown']))}")
+            print(f"   - Index: {metadata.get('index', {}).get('built', 'IndexFlatIP')}")
 
-    def similarity_search(self, query: str, k: int = 4, score_threshold: float = 0.7) -> List[Tuple[Document, float]]:
+    def is_current(self, corpus_fingerprint: Dict[str, Any], directory: str = "vector_store") -> bool:
+        """Check whether a saved vector store was built from the given corpus.
+        
+        Args:
+            corpus_fingerprint (Dict[str, Any]): Fingerprint of the current source files
+            directory (str): Directory containing the vector store
+            
+        Returns:
+            bool: True if the saved index exists and matches the fingerprint
+        """
+        if not os.path.exists(os.path.join(os.getcwd(), directory, "index.faiss")):
+            return False
+        metadata = self._load_metadata(directory)
+        if not metadata or not self._matches_config(metadata):
+            return False
+        return metadata.get("corpus_fingerprint") == corpus_fingerprint
+
+    def similarity_search(self, query: str, k: int = 4, score_threshold: Optional[float] = 0.7,
+                          fetch_k: Optional[int] = None, category: Optional[str] = None) -> List[Tuple[Document, float]]:
         """Search for similar documents with similarity scores.
         
+        The threshold is applied inside FAISS with a range search, so every
+        match above it is considered before the top `k` are taken. Index types
+        without range search fall back to fetching `fetch_k` candidates and
+        filtering them.
+        
+        Args:
+            query (str): Query string to search for
+            k (int): Number of results to return
+            score_threshold (Optional[float]): Minimum cosine similarity (0-1); None
+                returns the top `k` without a threshold
+            fetch_k (Optional[int]): Candidates fetched when range search is unavailable;
+                defaults to 4 * k
+            category (Optional[str]): Only search chunks tagged with this category;
+                None or an unknown category (e.g. "General") searches everything
+            
+        Returns:
+            List[Tuple[Document, float]]: (document, score) tuples, best match first
+        """
+        if not self.vector_store:
+            raise ValueError("No vector store available for search")
+        with tracer.span("query_embed"):
+            embedding = self.embeddings.embed_query(query)
+        return self.similarity_search_by_vector(embedding, k, score_threshold, fetch_k, category)
+
+    async def asimilarity_search(self, query: str, k: int = 4, score_threshold: Optional[float] = 0.7,
+                                 fetch_k: Optional[int] = None, category: Optional[str] = None) -> List[Tuple[Document, float]]:
+        """Async version of `similarity_search`; the FAISS search runs in a worker thread."""
+        if not self.vector_store:
+            raise ValueError("No vector store available for search")
+        with tracer.span("query_embed"):
+            embedding = await self.embeddings.aembed_query(query)
+        return await asyncio.to_thread(self.similarity_search_by_vector, embedding, k, score_threshold, fetch_k, category)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, score_threshold: Optional[float] = 0.7,
+                                    fetch_k: Optional[int] = None, category: Optional[str] = None) -> List[Tuple[Document, float]]:
+        """Search with an already computed query embedding; see `similarity_search`.
+        
+        Args:
+            embedding (List[float]): Query embedding
+            k (int): Number of results to return
+            score_threshold (Optional[float]): Minimum cosine similarity (0-1), or None
+            fetch_k (Optional[int]): Candidates fetched when range search is unavailable
+            category (Optional[str]): Only search chunks tagged with this category
+            
+        Returns:
+            List[Tuple[Document, float]]: (document, score) tuples, best match first
+        """
+        with tracer.span("search", mode="vector", k=k) as span:
+            selector, _ = self.category_filters.get(category, (None, None))
+            rows, scores = self._search_rows(embedding, k, score_threshold, fetch_k, selector)
+            span["results"] = len(rows)
+        return [(self._document_at(int(row)), float(score)) for row, score in zip(rows, scores)]
+
+    def hybrid_search(self, query: str, k: int = 4, score_threshold: Optional[float] = None,
+                      fetch_k: int = 20, rrf_k: int = 60, category: Optional[str] = None) -> List[Tuple[Document, float]]:
+        """Combine vector and BM25 keyword search with reciprocal-rank fusion.
+        
+        Exact tokens like `s3:PutBucketPolicy` or `t3.micro` that dense
+        embeddings blur are picked up by the keyword leg. Falls back to vector
+        search alone if the store has no BM25 index.
+        
         Args:
             query (str): Query string to search for
             k (int): Number of results to return
-            score_threshold (float): Minimum similarity score (0-1)
+            score_threshold (Optional[float]): Minimum cosine similarity for vector hits
+            fetch_k (int): Candidates taken from each retriever before fusion
+            rrf_k (int): Reciprocal-rank fusion damping constant
+            category (Optional[str]): Only search chunks tagged with this category
             
         Returns:
-            List[Tuple[Document, float]]: List of (document, score) tuples
+            List[Tuple[Document, float]]: (document, fused score) tuples, best match first
         """
         if not self.vector_store:
             raise ValueError("No vector store available for search")
+        with tracer.span("query_embed"):
+            embedding = self.embeddings.embed_query(query)
+        return self._hybrid_by_vector(query, embedding, k, score_threshold, fetch_k, rrf_k, category)
+
+    async def ahybrid_search(self, query: str, k: int = 4, score_threshold: Optional[float] = None,
+                             fetch_k: int = 20, rrf_k: int = 60, category: Optional[str] = None) -> List[Tuple[Document, float]]:
+        """Async version of `hybrid_search`; the index searches run in a worker thread."""
+        if not self.vector_store:
+            raise ValueError("No vector store available for search")
+        with tracer.span("query_embed"):
+            embedding = await self.embeddings.aembed_query(query)
+        return await asyncio.to_thread(self._hybrid_by_vector, query, embedding, k, score_threshold, fetch_k, rrf_k,
+                                       category)
+
+    def _hybrid_by_vector(self, query: str, embedding: List[float], k: int, score_threshold: Optional[float],
+                          fetch_k: int, rrf_k: int, category: Optional[str] = None) -> List[Tuple[Document, float]]:
+        """Fuse vector hits for `embedding` with BM25 hits for `query`."""
+        if self.bm25 is None:
+            return self.similarity_search_by_vector(embedding, k, score_threshold, category=category)
+        selector, mask = self.category_filters.get(category, (None, None))
+        with tracer.span("search", mode="hybrid", k=k) as span:
+            vector_rows, _ = self._search_rows(embedding, fetch_k, score_threshold, None, selector)
+            keyword_rows, _ = self.bm25.search(query, fetch_k, mask)
+            fused = reciprocal_rank_fusion([vector_rows, keyword_rows], rrf_k)[:k]
+            span["results"] = len(fused)
+        return [(self._document_at(row), score) for row, score in fused]
+
+    def _search_rows(self, embedding: List[float], k: int, score_threshold: Optional[float],
+                     fetch_k: Optional[int], selector: Optional[faiss.IDSelector] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Run the FAISS search and return matching rows and scores, best first.
+        
+        `selector` (a category's, from `category_filters`) is pushed into
+        FAISS, so rows outside it are skipped during the search rather than
+        filtered afterwards.
+        """
+        query_vector = np.array([embedding], dtype=np.float32)
+        faiss.normalize_L2(query_vector)
+        index = self.vector_store.index
+        params = self._search_parameters(selector)
+        
+        if score_threshold is None:
+            scores, indices = index.search(query_vector, k, params=params)
+            scores, indices = scores[0], indices[0]
+            keep = indices >= 0
+            scores, indices = scores[keep], indices[keep]
+        else:
+            try:
+                _, scores, indices = index.range_search(query_vector, score_threshold, params=params)
+            except RuntimeError:
+                # Over-fetch so filtering by threshold doesn't leave fewer than k results
+                scores, indices = index.search(query_vector, fetch_k or k * 4, params=params)
+                scores, indices = scores[0], indices[0]
+                keep = (indices >= 0) & (scores >= score_threshold)
+                scores, indices = scores[keep], indices[keep]
+        
+        # Best scores first
+        order = np.argsort(-scores)[:k]
+        return indices[order], scores[order]
+
+    def _set_category_rows(self, category_rows: Dict[str, np.ndarray]) -> None:
+        """Store the rows of each category and build their search filters.
+        
+        Args:
+            category_rows (Dict[str, np.ndarray]): Sorted FAISS rows per category
+        """
+        self.category_rows = category_rows
+        self.category_filters = {}
+        ntotal = self.vector_store.index.ntotal if self.vector_store else 0
+        for category, rows in category_rows.items():
+            mask = np.zeros(ntotal, dtype=bool)
+            mask[rows] = True
+            self.category_filters[category] = (faiss.IDSelectorBatch(rows), mask)
+
+    def _search_parameters(self, selector) -> Optional[faiss.SearchParameters]:
+        """Build per-query FAISS parameters carrying an ID selector.
+        
+        Per-query parameters replace the index's own nprobe/efSearch, so the
+        configured values are passed along with the selector.
+        
+        Args:
+            selector: faiss.IDSelector restricting the search, or None
+            
+        Returns:
+            Optional[faiss.SearchParameters]: Parameters for the index type, or None without a selector
+        """
+        if selector is None:
+            return None
+        index = self.vector_store.index
+        if faiss.try_extract_index_ivf(index) is not None:
+            return faiss.SearchParametersIVF(sel=selector, nprobe=int(self.index_config["nprobe"]))
+        if hasattr(index, "hnsw"):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=int(self.index_config["ef_search"]))
+        return faiss.SearchParameters(sel=selector)
+
+    def _document_at(self, position: int) -> Document:
+        """Look up the document stored at a FAISS index position.
         
-        # Get documents and scores
-        docs_and_scores = self.vector_store.similarity_search_with_score(query, k=k)
+        Args:
+            position (int): Row in the FAISS index
+            
+        Returns:
+            Document: The stored document
+        """
+        docstore_id = self.vector_store.index_to_docstore_id[position]
+        return self.vector_store.docstore.search(docstore_id)
+
+    def _load_faiss(self, path: str) -> FAISS:
+        """Load a saved FAISS store with this class's similarity settings.
         
-        # Filter by score threshold and sort by score
-        filtered_results = [(doc, score) for doc, score in docs_and_scores if score >= score_threshold]
-        filtered_results.sort(key=lambda x: x[1], reverse=True)
+        Args:
+            path (str): Directory containing index.faiss and index.pkl
+            
+        Returns:
+            FAISS: The loaded store
+        """
+        # index.pkl is written by this class, so unpickling it is safe
+        return FAISS.load_local(
+            path, self.embeddings, allow_dangerous_deserialization=True,
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT, normalize_L2=True
+        )
+
+    def _save_faiss(self, path: str) -> None:
+        """Save the FAISS store without rewriting files other processes may have mapped.
+        
+        `save_local` truncates index.faiss in place, which breaks readers that
+        memory-mapped it; the files are written to a temporary directory and
+        renamed over the old ones, so existing mappings keep the old inode.
+        
+        Args:
+            path (str): Vector store directory
+        """
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        os.makedirs(tmp_path, exist_ok=True)
+        self.vector_store.save_local(tmp_path)
+        for name in ("index.faiss", "index.pkl"):
+            os.replace(os.path.join(tmp_path, name), os.path.join(path, name))
+        os.rmdir(tmp_path)
+
+    def _mmap_faiss(self, path: str) -> FAISS:
+        """Open a saved FAISS store read-only, memory-mapping the index and chunk sidecar.
         
-        return filtered_results
+        Args:
+            path (str): Directory containing index.faiss and the docstore sidecar
+            
+        Returns:
+            FAISS: The loaded store, addressing documents by FAISS row
+        """
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        # Newer faiss can also map flat vector codes, not just IVF inverted lists
+        if hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+            flags |= faiss.IO_FLAG_MMAP_IFC
+        else:
+            print("⚠️ This faiss build can't memory-map flat vectors; they are read into memory per process")
+        index = faiss.read_index(os.path.join(path, "index.faiss"), flags)
+        docstore = MmapDocstore(path)
+        return FAISS(
+            self.embeddings, index, docstore, RowIds(len(docstore)),
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT, normalize_L2=True
+        )
 
     def _save_metadata(self, directory: str, metadata: Dict[str, Any]) -> None:
         """Save metadata about the vector store.
@@ -133,4 +664,30 @@ class VectorStore:
         if os.path.exists(metadata_path):
             with open(metadata_path, 'r') as f:
                 return json.load(f)
-        return None 
\ No newline at end of file
+        return None
+
+    def _save_manifest(self, directory: str, manifest: Dict[str, str]) -> None:
+        """Save the chunk manifest mapping content-hash ids to their source.
+        
+        Args:
+            directory (str): Directory to save manifest in
+            manifest (Dict[str, str]): Chunk id to source mapping
+        """
+        manifest_path = os.path.join(os.getcwd(), directory, self.manifest_file)
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+
+    def _load_manifest(self, directory: str) -> Optional[Dict[str, str]]:
+        """Load the chunk manifest.
+        
+        Args:
+            directory (str): Directory containing the manifest
+            
+        Returns:
+            Optional[Dict[str, str]]: Chunk id to source mapping or None if not found
+        """
+        manifest_path = os.path.join(os.getcwd(), directory, self.manifest_file)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as f:
+                return json.load(f)
+        return None